@@ -24,6 +24,7 @@ install_requires = [
 # Optional dependencies for enhanced features
 extras_require = {
     "watch": ["watchdog>=2.1.0"],  # For efficient file monitoring
+    "fast": ["orjson>=3.8", "xxhash>=3.0", "pybase64>=1.2"],  # Faster tape I/O, naming, redaction
     "dev": [
         "pytest>=7.0.0",
         "pytest-asyncio>=0.18.0",
@@ -20,6 +20,7 @@ from contextlib import contextmanager
 from collections import deque
 
 import pexpect
+from pexpect.popen_spawn import PopenSpawn
 import psutil
 
 from .exceptions import SessionError, TimeoutError, ProcessError, ConfigNotFoundError
@@ -29,7 +30,7 @@ from .patterns import COMMON_PROMPTS, COMMON_ERRORS
 from .replay.modes import RecordMode, FallbackMode
 from .replay.store import TapeStore
 from .replay.record import Recorder, ChunkSink
-from .replay.play import ReplayTransport, LiveTransport
+from .replay.play import ReplayTransport, LiveTransport, _USE_POLL
 from .replay.namegen import DefaultTapeNameGenerator
 from .replay.matchers import create_matcher_set
 from .replay.decorators import DecoratorSet
@@ -93,8 +94,9 @@ class Session:
         session_id: Optional[str] = None,
         persist: bool = True,
         stream: bool = False,
+        pty: bool = True,
         # Record/Replay parameters
-        tapes_path: str = "./tapes",
+        tapes_path: Union[str, Path] = "./tapes",
         record: RecordMode = RecordMode.DISABLED,
         fallback: FallbackMode = FallbackMode.NOT_FOUND,
         tape_name_generator: Optional[Any] = None,
@@ -127,6 +129,7 @@ class Session:
         self.encoding = encoding
         self.cwd = cwd or os.getcwd()
         self.env = env or os.environ.copy()
+        self.pty = pty
 
         # Output management with rotation
         config = _load_config()
@@ -612,15 +615,26 @@ class Session:
         """Setup live transport with optional recording"""
         try:
             # Create the real process
-            self.process = pexpect.spawn(
-                command,
-                timeout=timeout,
-                cwd=cwd,
-                env=env,
-                encoding=encoding,
-                dimensions=dimensions,
-                echo=False,
-            )
+            if self.pty:
+                self.process = pexpect.spawn(
+                    command,
+                    timeout=timeout,
+                    cwd=cwd,
+                    env=env,
+                    encoding=encoding,
+                    dimensions=dimensions,
+                    echo=False,
+                    use_poll=_USE_POLL,
+                )
+            else:
+                # Plain pipes skip pty setup for programs that never check for a terminal
+                self.process = PopenSpawn(
+                    command,
+                    timeout=timeout,
+                    cwd=cwd,
+                    env=env,
+                    encoding=encoding,
+                )
 
             # Wrap in live transport
             self._transport = LiveTransport(self.process)
@@ -43,11 +43,17 @@ class DecoratorSet:
 
 def chain_decorators(*decorators: Callable) -> Callable:
     """Chain multiple decorators together"""
+    # Drop unset decorators once here rather than on every call
+    active = tuple(d for d in decorators if d)
+    if not active:
+        return lambda ctx, data: data
+    if len(active) == 1:
+        return active[0]
+
     def chained(ctx: Any, data: Any) -> Any:
         result = data
-        for decorator in decorators:
-            if decorator:
-                result = decorator(ctx, result)
+        for decorator in active:
+            result = decorator(ctx, result)
         return result
     return chained
 
@@ -91,12 +97,14 @@ def uppercase_input_decorator(ctx: MatchingContext, data: bytes) -> bytes:
 
 def prefix_output_decorator(prefix: str) -> OutputDecorator:
     """Factory for adding prefix to output lines"""
+    prefix_bytes = prefix.encode('utf-8')
+    line_break = b'\n' + prefix_bytes
+
     def decorator(ctx: MatchingContext, data: bytes) -> bytes:
-        try:
-            text = data.decode('utf-8')
-            lines = text.splitlines(keepends=True)
-            prefixed = ''.join(f"{prefix}{line}" for line in lines)
-            return prefixed.encode('utf-8')
-        except:
+        if not data:
             return data
+        # Prefix every line in one replace pass, without decoding
+        if data.endswith(b'\n'):
+            return prefix_bytes + data[:-1].replace(b'\n', line_break) + b'\n'
+        return prefix_bytes + data.replace(b'\n', line_break)
     return decorator
\ No newline at end of file
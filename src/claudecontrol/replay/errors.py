@@ -10,7 +10,8 @@ from typing import Union, Callable, Any, Optional
 ErrorRateConfig = Union[float, Callable[[Any], float]]
 
 
-def should_inject_error(rate_config: ErrorRateConfig, context: Any = None, seed: Optional[int] = None) -> bool:
+def should_inject_error(rate_config: ErrorRateConfig, context: Any = None, seed: Optional[int] = None,
+                        rng: Optional[random.Random] = None) -> bool:
     """
     Determine if an error should be injected.
 
@@ -18,6 +19,7 @@ def should_inject_error(rate_config: ErrorRateConfig, context: Any = None, seed:
         rate_config: 0-100 probability or callable returning probability
         context: Context passed to callable configs
         seed: Random seed for deterministic behavior
+        rng: Random generator to draw from (takes precedence over seed)
 
     Returns:
         True if error should be injected
@@ -37,11 +39,9 @@ def should_inject_error(rate_config: ErrorRateConfig, context: Any = None, seed:
         return True
 
     # Use seed for determinism if provided
-    if seed is not None:
+    if rng is None and seed is not None:
         rng = random.Random(seed)
-        return rng.random() * 100 < rate
-    else:
-        return random.random() * 100 < rate
+    return (rng or random).random() * 100 < rate
 
 
 class ErrorInjectionPolicy:
@@ -68,10 +68,29 @@ class ErrorInjectionPolicy:
         self.error_message = error_message
         self.truncate_at = max(0.0, min(1.0, truncate_at))
         self.seed = seed
+        # Static rates are resolved once; callables are still evaluated per exchange
+        self._resolved_rate: Optional[float] = (
+            None if error_rate is None or callable(error_rate) else float(error_rate)
+        )
 
-    def should_fail(self, context: Any = None) -> bool:
-        """Check if this exchange should fail"""
-        return should_inject_error(self.error_rate, context, self.seed)
+    def new_rng(self) -> random.Random:
+        """
+        Generator for one session's draws; the policy itself holds no draw state,
+        so shared presets stay independent across sessions.
+        Unseeded policies seed it from the global random, so random.seed() applies.
+        """
+        return random.Random(self.seed if self.seed is not None else random.getrandbits(64))
+
+    def should_fail(self, context: Any = None, rng: Optional[random.Random] = None) -> bool:
+        """Check if this exchange should fail, drawing from rng (see new_rng) if given"""
+        rate = self._resolved_rate
+        if rate is None or rng is None:
+            return should_inject_error(self.error_rate, context, self.seed, rng=rng)
+        if rate <= 0:
+            return False
+        if rate >= 100:
+            return True
+        return rng.random() * 100 < rate
 
     def get_truncation_point(self, total_chunks: int) -> int:
         """Get chunk index at which to inject error"""
@@ -5,7 +5,7 @@ Supports constant, range, and function-based latency
 
 import random
 import time
-from typing import Union, Tuple, Callable, Any, Optional
+from typing import Union, Tuple, Callable, Any, Optional, List, Sequence
 
 
 LatencyConfig = Union[int, Tuple[int, int], Callable[[Any], int]]
@@ -69,6 +69,23 @@ class LatencyPolicy:
         else:
             return recorded_delay
 
+    def precompute_delays(self, recorded_delays: Sequence[int], context: Any = None) -> List[int]:
+        """Get delays for a whole chunk sequence in one pass"""
+        if self.chunk_latency is not None:
+            config = self.chunk_latency
+        elif self.global_latency:
+            config = self.global_latency
+        else:
+            return list(recorded_delays)
+
+        count = len(recorded_delays)
+        if isinstance(config, (tuple, list)) and len(config) == 2:
+            min_ms, max_ms = config
+            return random.choices(range(int(min_ms), int(max_ms) + 1), k=count)
+        if callable(config):
+            return [resolve_latency(config, context) for _ in range(count)]
+        return [int(config)] * count
+
     def get_exchange_delay(self, context: Any = None) -> int:
         """Get delay before starting new exchange"""
         if self.exchange_latency is not None:
@@ -3,16 +3,21 @@ Matchers for tape selection during replay
 Supports command, environment, prompt, and stdin matching with configurability
 """
 
-from dataclasses import dataclass
-from typing import Callable, List, Dict, Optional, Set, Any, Protocol, Union
+from dataclasses import dataclass, field
+from typing import Callable, List, Dict, Optional, Set, Any, Protocol, Union, Tuple, FrozenSet
 from pathlib import Path
+from functools import lru_cache
+import json
+import operator
 import re
 import os
+import sys
 
+from .model import SLOTS
 from .normalize import normalize_for_matching, strip_ansi
 
 
-@dataclass
+@dataclass(**SLOTS)
 class MatchingContext:
     """Context for matching operations"""
     program: str
@@ -38,6 +43,21 @@ class MatchingContext:
         }
 
 
+class LazyContext:
+    """
+    Log argument that renders a MatchingContext only when the record is emitted.
+    Use as logger.debug("... %s", LazyContext(ctx)) to keep to_dict() off the
+    hot path when debug logging is disabled.
+    """
+    __slots__ = ('ctx',)
+
+    def __init__(self, ctx: MatchingContext):
+        self.ctx = ctx
+
+    def __str__(self) -> str:
+        return json.dumps(self.ctx.to_dict(), default=str)
+
+
 # Type definitions for matcher functions
 StdinMatcher = Callable[[bytes, bytes, MatchingContext], bool]
 CommandMatcher = Callable[[List[str], List[str], MatchingContext], bool]
@@ -52,7 +72,48 @@ class MatcherProtocol(Protocol):
         ...
 
 
-@dataclass
+@lru_cache(maxsize=4096)
+def _normalize_path(arg: str) -> str:
+    """Normalize path arguments (cached, since resolve() hits the filesystem)"""
+    if arg.startswith('/') or arg.startswith('~'):
+        # Expand and resolve
+        try:
+            path = Path(arg).expanduser().resolve()
+            return str(path)
+        except:
+            pass
+    return arg
+
+
+def _stdin_normalized(recorded: bytes, current: bytes) -> bool:
+    """Compare stdin after text normalization, falling back to bytes"""
+    # Identical bytes normalize identically, so skip decoding
+    if recorded == current:
+        return True
+    try:
+        return normalize_for_matching(recorded.decode('utf-8')) == normalize_for_matching(current.decode('utf-8'))
+    except UnicodeDecodeError:
+        return False
+
+
+def _stdin_stripped(recorded: bytes, current: bytes) -> bool:
+    return recorded.rstrip(b'\r\n') == current.rstrip(b'\r\n')
+
+
+def _stdin_stripped_normalized(recorded: bytes, current: bytes) -> bool:
+    return _stdin_normalized(recorded.rstrip(b'\r\n'), current.rstrip(b'\r\n'))
+
+
+# (normalize, ignore_trailing_newline) -> comparison
+_STDIN_IMPLS: Dict[Tuple[bool, bool], Callable[[bytes, bytes], bool]] = {
+    (False, False): operator.eq,
+    (False, True): _stdin_stripped,
+    (True, False): _stdin_normalized,
+    (True, True): _stdin_stripped_normalized,
+}
+
+
+@dataclass(**SLOTS)
 class DefaultStdinMatcher:
     """Default stdin matcher with normalization"""
     normalize: bool = True
@@ -60,30 +121,46 @@ class DefaultStdinMatcher:
 
     def __call__(self, recorded: bytes, current: bytes, ctx: MatchingContext) -> bool:
         """Match stdin data with optional normalization"""
-        if self.ignore_trailing_newline:
-            recorded = recorded.rstrip(b'\r\n')
-            current = current.rstrip(b'\r\n')
+        # Dispatch on the current flags, so changing them later takes effect (as in key())
+        return _STDIN_IMPLS[bool(self.normalize), bool(self.ignore_trailing_newline)](recorded, current)
 
+    def key(self, data: bytes) -> Union[str, bytes]:
+        """Hashable form of stdin; two inputs match exactly when their keys are equal"""
+        if self.ignore_trailing_newline:
+            data = data.rstrip(b'\r\n')
         if self.normalize:
-            # Convert to string for normalization
             try:
-                recorded_str = recorded.decode('utf-8')
-                current_str = current.decode('utf-8')
-                recorded_str = normalize_for_matching(recorded_str)
-                current_str = normalize_for_matching(current_str)
-                return recorded_str == current_str
+                return normalize_for_matching(data.decode('utf-8'))
             except UnicodeDecodeError:
-                # Fall back to byte comparison
                 pass
+        return data
 
-        return recorded == current
 
-
-@dataclass
+@dataclass(**SLOTS)
 class DefaultCommandMatcher:
     """Default command matcher with path normalization"""
     normalize_paths: bool = True
     ignore_args: Optional[List[Union[int, str]]] = None
+    _ignore_idx: FrozenSet[int] = field(default=frozenset(), init=False, repr=False, compare=False)
+    _ignore_prefixes: Tuple[str, ...] = field(default=(), init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Split ignore_args once so str.startswith can test all prefixes in one call
+        ignore = self.ignore_args or ()
+        self._ignore_idx = frozenset(i for i in ignore if isinstance(i, int))
+        self._ignore_prefixes = tuple(p for p in ignore if isinstance(p, str))
+
+    def _args(self, argv: List[str]) -> List[str]:
+        """Args after the program name, with ignores applied and paths normalized in one pass"""
+        if not self._ignore_idx and not self._ignore_prefixes:
+            return [_normalize_path(a) for a in argv[1:]] if self.normalize_paths else argv[1:]
+
+        idx, prefixes, norm = self._ignore_idx, self._ignore_prefixes, self.normalize_paths
+        return [
+            "<IGNORED>" if i in idx or (prefixes and a.startswith(prefixes))
+            else (_normalize_path(a) if norm else a)
+            for i, a in enumerate(argv[1:])
+        ]
 
     def __call__(self, recorded: List[str], current: List[str], ctx: MatchingContext) -> bool:
         """Match command and args with normalization"""
@@ -94,48 +171,16 @@ class DefaultCommandMatcher:
         if rec_prog != cur_prog:
             return False
 
-        # Match args
-        rec_args = list(recorded[1:] if len(recorded) > 1 else [])
-        cur_args = list(current[1:] if len(current) > 1 else [])
-
-        # Apply ignore_args filter
-        if self.ignore_args:
-            for ignore in self.ignore_args:
-                if isinstance(ignore, int):
-                    # Remove by index
-                    if 0 <= ignore < len(rec_args):
-                        rec_args[ignore] = "<IGNORED>"
-                    if 0 <= ignore < len(cur_args):
-                        cur_args[ignore] = "<IGNORED>"
-                elif isinstance(ignore, str):
-                    # Remove by prefix
-                    rec_args = [a if not a.startswith(ignore) else "<IGNORED>" for a in rec_args]
-                    cur_args = [a if not a.startswith(ignore) else "<IGNORED>" for a in cur_args]
-
-        # Normalize paths if requested
-        if self.normalize_paths:
-            rec_args = [self._normalize_path(a) for a in rec_args]
-            cur_args = [self._normalize_path(a) for a in cur_args]
-
-        return rec_args == cur_args
-
-    def _normalize_path(self, arg: str) -> str:
-        """Normalize path arguments"""
-        if arg.startswith('/') or arg.startswith('~'):
-            # Expand and resolve
-            try:
-                path = Path(arg).expanduser().resolve()
-                return str(path)
-            except:
-                pass
-        return arg
+        return self._args(recorded) == self._args(current)
 
 
-@dataclass
+@dataclass(**SLOTS)
 class DefaultEnvMatcher:
     """Default environment matcher with allow/ignore lists"""
     allow_env: Optional[List[str]] = None
     ignore_env: Optional[List[str]] = None
+    _ignore_set: FrozenSet[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    _allow_set: Optional[FrozenSet[str]] = field(default=None, init=False, repr=False, compare=False)
 
     def __post_init__(self):
         # Default ignore list (like Talkback)
@@ -150,29 +195,81 @@ class DefaultEnvMatcher:
                 'TERM_SESSION_ID', 'TERM_PROGRAM',
             ]
 
+        # Compile the key lists to sets once instead of on every match
+        # (interned, like the env keys of loaded tapes)
+        self._ignore_set = frozenset(sys.intern(k) for k in self.ignore_env or ())
+        self._allow_set = frozenset(sys.intern(k) for k in self.allow_env) if self.allow_env else None
+
     def __call__(self, recorded: Dict[str, str], current: Dict[str, str], ctx: MatchingContext) -> bool:
         """Match environment variables with filtering"""
-        # Build effective key set
-        if self.allow_env:
+        if self._allow_set is not None:
             # Only check allowed vars
-            keys = set(self.allow_env)
-        else:
-            # Check all except ignored
-            keys = set(recorded.keys()) | set(current.keys())
-            if self.ignore_env:
-                keys -= set(self.ignore_env)
-
-        # Compare relevant variables
-        for key in keys:
-            rec_val = recorded.get(key)
-            cur_val = current.get(key)
-            if rec_val != cur_val:
+            return all(recorded.get(key) == current.get(key) for key in self._allow_set)
+
+        # Check all except ignored, without building the union of both key sets
+        ignore = self._ignore_set
+        for key, rec_val in recorded.items():
+            if key not in ignore and current.get(key) != rec_val:
+                return False
+        for key in current:
+            if key not in ignore and key not in recorded:
                 return False
 
         return True
 
 
-@dataclass
+@lru_cache(maxsize=1024)
+def _compile_prompt(pattern: str) -> re.Pattern:
+    """Compile a recorded prompt pattern once per distinct prompt"""
+    return re.compile(pattern)
+
+
+def _strip_ansi_normalized(text: str) -> str:
+    return normalize_for_matching(strip_ansi(text))
+
+
+# (strip_ansi, normalize) -> prompt transform, or None for the raw text
+_PROMPT_TRANSFORMS: Dict[Tuple[bool, bool], Optional[Callable[[str], str]]] = {
+    (False, False): None,
+    (False, True): normalize_for_matching,
+    (True, False): strip_ansi,
+    (True, True): _strip_ansi_normalized,
+}
+
+
+def _prompt_regex_impl(prepare: Optional[Callable[[str], str]]) -> Callable[[str, str], bool]:
+    """Regex prompt comparison after an optional transform"""
+    def impl(recorded: str, current: str) -> bool:
+        if prepare:
+            recorded, current = prepare(recorded), prepare(current)
+        try:
+            return bool(_compile_prompt(recorded).search(current))
+        except re.error:
+            # Fall back to exact match
+            return recorded == current
+    return impl
+
+
+def _prompt_exact_impl(prepare: Optional[Callable[[str], str]]) -> Callable[[str, str], bool]:
+    """Exact prompt comparison after an optional transform"""
+    if prepare is None:
+        return operator.eq
+
+    def impl(recorded: str, current: str) -> bool:
+        # Identical prompts stay identical after stripping and normalizing
+        return recorded == current or prepare(recorded) == prepare(current)
+    return impl
+
+
+# (use_regex, strip_ansi, normalize) -> comparison
+_PROMPT_IMPLS: Dict[Tuple[bool, bool, bool], Callable[[str, str], bool]] = {
+    (use_regex, strip, norm): (_prompt_regex_impl if use_regex else _prompt_exact_impl)(prepare)
+    for (strip, norm), prepare in _PROMPT_TRANSFORMS.items()
+    for use_regex in (False, True)
+}
+
+
+@dataclass(**SLOTS)
 class DefaultPromptMatcher:
     """Default prompt matcher with ANSI handling"""
     strip_ansi: bool = True
@@ -181,23 +278,9 @@ class DefaultPromptMatcher:
 
     def __call__(self, recorded: str, current: str, ctx: MatchingContext) -> bool:
         """Match prompt strings"""
-        if self.strip_ansi:
-            recorded = strip_ansi(recorded)
-            current = strip_ansi(current)
-
-        if self.normalize:
-            recorded = normalize_for_matching(recorded)
-            current = normalize_for_matching(current)
-
-        if self.use_regex:
-            try:
-                pattern = re.compile(recorded)
-                return bool(pattern.search(current))
-            except re.error:
-                # Fall back to exact match
-                pass
-
-        return recorded == current
+        # Dispatch on the current flags, so changing them later takes effect (as in TapeIndex)
+        impl = _PROMPT_IMPLS[bool(self.use_regex), bool(self.strip_ansi), bool(self.normalize)]
+        return impl(recorded, current)
 
 
 @dataclass
@@ -268,6 +351,63 @@ class CompositeMatcher:
 
         return True
 
+    def build_index(self, tapes: List[Any]) -> Optional['TapeIndex']:
+        """Build a hash index over tapes, or None if custom matchers are configured"""
+        if not (type(self.command_matcher) is DefaultCommandMatcher
+                and not self.command_matcher.ignore_args
+                and type(self.prompt_matcher) is DefaultPromptMatcher
+                and not self.prompt_matcher.use_regex
+                and type(self.stdin_matcher) is DefaultStdinMatcher):
+            return None
+        return TapeIndex(self, tapes)
+
+
+class TapeIndex:
+    """
+    Hash index of recorded exchanges for the default matcher set.
+    Keys apply the same normalization as the default command, prompt and
+    stdin matchers, so a lookup replaces a scan over every exchange.
+    Candidates are still verified with match_exchange (env, state).
+    """
+
+    def __init__(self, matcher: CompositeMatcher, tapes: List[Any]):
+        self.matcher = matcher
+        self._entries: Dict[tuple, List[Tuple[Any, Any]]] = {}
+
+        for tape in tapes:
+            command = [tape.meta.program] + list(tape.meta.args)
+            for exchange in tape.exchanges:
+                data_text = exchange.input.data_text
+                key = self._key(command,
+                                exchange.pre.get('prompt', ''),
+                                data_text.encode('utf-8') if data_text else b'')
+                self._entries.setdefault(key, []).append((tape, exchange))
+
+    def lookup(self, context: MatchingContext, current_input: bytes) -> Optional[Tuple[Any, Any]]:
+        """Return the first (tape, exchange) matching the context, if indexed"""
+        key = self._key([context.program] + list(context.args), context.prompt, current_input)
+        for tape, exchange in self._entries.get(key, ()):
+            if self.matcher.match_exchange(tape, exchange, context, current_input):
+                return tape, exchange
+        return None
+
+    def _key(self, command: List[str], prompt: str, stdin: bytes) -> tuple:
+        """Build the lookup key for a command, prompt and stdin"""
+        command_matcher = self.matcher.command_matcher
+        prompt_matcher = self.matcher.prompt_matcher
+
+        program = Path(command[0]).name if command else ""
+        args = command[1:]
+        if command_matcher.normalize_paths:
+            args = [_normalize_path(a) for a in args]
+
+        if prompt_matcher.strip_ansi:
+            prompt = strip_ansi(prompt)
+        if prompt_matcher.normalize:
+            prompt = normalize_for_matching(prompt)
+
+        return (program, tuple(args), prompt, self.matcher.stdin_matcher.key(stdin))
+
 
 def create_matcher_set(allow_env: Optional[List[str]] = None,
                       ignore_env: Optional[List[str]] = None,
@@ -275,11 +415,11 @@ def create_matcher_set(allow_env: Optional[List[str]] = None,
                       ignore_stdin: bool = False,
                       stdin_matcher: Optional[StdinMatcher] = None,
                       command_matcher: Optional[CommandMatcher] = None) -> CompositeMatcher:
-    """Factory for creating configured matcher set"""
+    """Factory for creating configured matcher set (fresh instances on every call)"""
     return CompositeMatcher(
         command_matcher=command_matcher or DefaultCommandMatcher(ignore_args=ignore_args),
         env_matcher=DefaultEnvMatcher(allow_env=allow_env, ignore_env=ignore_env),
         prompt_matcher=DefaultPromptMatcher(),
         stdin_matcher=(lambda r, c, ctx: True) if ignore_stdin else (stdin_matcher or DefaultStdinMatcher()),
         state_matcher=StateMatcher()
-    )
\ No newline at end of file
+    )
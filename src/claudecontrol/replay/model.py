@@ -5,18 +5,72 @@ JSON5-compatible structures for human-editable tapes
 
 from __future__ import annotations
 from dataclasses import dataclass, field
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterable, Iterator
 from datetime import datetime
-import base64
+from functools import partial
+import binascii
+import json
+import re
+import sys
 
+try:
+    import orjson
+except ImportError:  # optional; stdlib json is used without it
+    orjson = None
 
-@dataclass
+# Slotted dataclasses (Python 3.10+) drop the per-instance __dict__,
+# which adds up on tapes with thousands of chunks
+SLOTS: Dict[str, bool] = {'slots': True} if sys.version_info >= (3, 10) else {}
+
+# Compact separators match what pyjson5 writes (orjson, if used, emits the same layout)
+_JSON_SEPARATORS = (',', ':')
+_JSON_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+def _dumpb(obj: Any) -> bytes:
+    """Compact JSON as UTF-8 bytes; orjson output is written without a str round-trip"""
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=_JSON_SEPARATORS).encode('utf-8')
+
+
+_b64encode = partial(binascii.b2a_base64, newline=False)
+
+
+def encode_chunks_b64(payloads: Iterable[bytes]) -> List[str]:
+    """Base64-encode many chunk payloads, iterating in C rather than per-chunk Python calls"""
+    return list(map(bytes.decode, map(_b64encode, payloads)))
+
+
+# Not frozen: frozen __init__ goes through object.__setattr__ per field, several
+# times slower for the thousands of chunks built per tape. Chunks are still
+# treated as immutable, and unsafe_hash keeps them hashable.
+@dataclass(init=False, unsafe_hash=True, **SLOTS)
 class Chunk:
     """A single output chunk with timing information"""
     delay_ms: int
-    data_b64: str
+    data: bytes
     is_utf8: bool = True
 
+    def __init__(self, delay_ms: int, data: Optional[bytes] = None, is_utf8: bool = True,
+                 *, data_b64: Optional[str] = None):
+        """Create from raw bytes, or from base64 text via the older data_b64 keyword"""
+        if data_b64 is not None:
+            if data is not None:
+                raise TypeError("Chunk() takes data or data_b64, not both")
+            data = binascii.a2b_base64(data_b64)
+        self.delay_ms = delay_ms
+        self.data = b'' if data is None else data
+        self.is_utf8 = is_utf8
+
+    @property
+    def data_b64(self) -> str:
+        """Base64 form of the chunk data, encoded only when serializing"""
+        return _b64encode(self.data).decode('ascii')
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert to JSON5-compatible dict"""
         return {
@@ -30,12 +84,12 @@ class Chunk:
         """Create from JSON5 dict"""
         return cls(
             delay_ms=data.get("delay_ms", 0),
-            data_b64=data.get("dataB64", ""),
+            data=binascii.a2b_base64(data.get("dataB64", "")),
             is_utf8=data.get("isUtf8", True)
         )
 
 
-@dataclass
+@dataclass(**SLOTS)
 class IOInput:
     """Input data sent to the process"""
     kind: str  # "line" or "raw"
@@ -60,15 +114,19 @@ class IOInput:
         )
 
 
-@dataclass
+@dataclass(**SLOTS)
 class IOOutput:
     """Output chunks received from the process"""
     chunks: List[Chunk] = field(default_factory=list)
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to JSON5-compatible dict"""
+        encoded = encode_chunks_b64([c.data for c in self.chunks])
         return {
-            "chunks": [c.to_dict() for c in self.chunks]
+            "chunks": [
+                {"delay_ms": c.delay_ms, "dataB64": data_b64, "isUtf8": c.is_utf8}
+                for c, data_b64 in zip(self.chunks, encoded)
+            ]
         }
 
     @classmethod
@@ -78,7 +136,7 @@ class IOOutput:
         return cls(chunks=chunks)
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Exchange:
     """A single exchange: input -> output sequence"""
     pre: Dict[str, Any]  # prompt signature, optional state hash
@@ -104,8 +162,9 @@ class Exchange:
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> Exchange:
         """Create from JSON5 dict"""
+        # Intern keys: the same few names repeat across every loaded tape
         return cls(
-            pre=data.get("pre", {}),
+            pre={sys.intern(k): v for k, v in data.get("pre", {}).items()},
             input=IOInput.from_dict(data.get("input", {})),
             output=IOOutput.from_dict(data.get("output", {})),
             exit=data.get("exit"),
@@ -114,7 +173,7 @@ class Exchange:
         )
 
 
-@dataclass
+@dataclass(**SLOTS)
 class TapeMeta:
     """Metadata about the tape recording"""
     created_at: str
@@ -153,10 +212,10 @@ class TapeMeta:
     def from_dict(cls, data: Dict[str, Any]) -> TapeMeta:
         """Create from JSON5 dict"""
         return cls(
-            created_at=data.get("createdAt", datetime.now().isoformat()),
+            created_at=data.get("createdAt") or datetime.now().isoformat(),
             program=data.get("program", ""),
             args=data.get("args", []),
-            env=data.get("env", {}),
+            env={sys.intern(k): v for k, v in data.get("env", {}).items()},
             cwd=data.get("cwd", "."),
             pty=data.get("pty"),
             tag=data.get("tag"),
@@ -166,7 +225,7 @@ class TapeMeta:
         )
 
 
-@dataclass
+@dataclass(**SLOTS)
 class Tape:
     """A complete tape with metadata and exchanges"""
     meta: TapeMeta
@@ -190,21 +249,91 @@ class Tape:
             exchanges=[Exchange.from_dict(e) for e in data.get("exchanges", [])]
         )
 
+    def iter_json_bytes(self, transform: Optional[Callable[[Dict[str, Any]], Dict[str, Any]]] = None) -> Iterator[bytes]:
+        """
+        Yield the tape as UTF-8 JSON fragments, one exchange at a time.
+        An optional transform is applied to each exchange dict before encoding.
+        """
+        exchanges = (e.to_dict() for e in self.exchanges)
+        if transform:
+            exchanges = (transform(e) for e in exchanges)
+        return iter_tape_json_bytes(self.meta.to_dict(), self.session, exchanges)
+
+    @classmethod
+    def from_json_text(cls, text: str) -> Tape:
+        """
+        Parse strict JSON tape text, converting each exchange as soon as it is
+        decoded so the exchange dicts never all exist at once (the text itself
+        is held in full).
+        Raises ValueError on JSON5-only syntax (comments, trailing commas).
+        """
+        decoder = json.JSONDecoder()
+        fields: Dict[str, Any] = {}
+        exchanges: List[Exchange] = []
+
+        def skip(pos: int, expected: str = '') -> int:
+            pos = _JSON_WHITESPACE.match(text, pos).end()
+            if expected:
+                if not text.startswith(expected, pos):
+                    raise ValueError(f"Expected {expected!r} at offset {pos}")
+                pos = _JSON_WHITESPACE.match(text, pos + 1).end()
+            return pos
+
+        pos = skip(0, '{')
+        while not text.startswith('}', pos):
+            key, pos = decoder.raw_decode(text, pos)
+            pos = skip(pos, ':')
+            if key == 'exchanges':
+                pos = skip(pos, '[')
+                while not text.startswith(']', pos):
+                    value, pos = decoder.raw_decode(text, pos)
+                    exchanges.append(Exchange.from_dict(value))
+                    pos = skip(pos)
+                    if text.startswith(',', pos):
+                        pos = skip(pos, ',')
+                pos = skip(pos, ']')
+                fields[key] = exchanges
+            else:
+                fields[key], pos = decoder.raw_decode(text, pos)
+                pos = skip(pos)
+            if text.startswith(',', pos):
+                pos = skip(pos, ',')
+        if skip(pos, '}') != len(text):
+            raise ValueError("Trailing data after tape object")
+
+        return cls(
+            meta=TapeMeta.from_dict(fields.get("meta", {})),
+            session=fields.get("session", {}),
+            exchanges=exchanges
+        )
+
     def encode_data(self, data: bytes) -> tuple[Optional[str], str]:
         """Encode data as text or base64
         Returns: (text, base64)
         """
+        b64 = _b64encode(data).decode('ascii')
         try:
-            text = data.decode('utf-8')
-            return (text, base64.b64encode(data).decode('ascii'))
+            return (data.decode('utf-8'), b64)
         except UnicodeDecodeError:
-            return (None, base64.b64encode(data).decode('ascii'))
+            return (None, b64)
 
     def decode_data(self, text: Optional[str], b64: Optional[str]) -> bytes:
         """Decode data from text or base64"""
         if text is not None:
             return text.encode('utf-8')
         elif b64 is not None:
-            return base64.b64decode(b64)
+            return binascii.a2b_base64(b64)
         else:
-            return b''
\ No newline at end of file
+            return b''
+
+
+def iter_tape_json_bytes(meta: Dict[str, Any],
+                         session: Dict[str, Any],
+                         exchanges: Iterable[Dict[str, Any]]) -> Iterator[bytes]:
+    """Encode tape parts as UTF-8 JSON fragments without building the whole tape dict"""
+    yield b'{"meta":' + _dumpb(meta)
+    yield b',"session":' + _dumpb(session)
+    yield b',"exchanges":['
+    for i, exchange in enumerate(exchanges):
+        yield (b',' if i else b'') + _dumpb(exchange)
+    yield b']}'
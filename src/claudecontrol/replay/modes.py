@@ -3,18 +3,18 @@ Recording and fallback modes for tape management
 Mirrors Talkback's mode semantics for record and fallback behavior
 """
 
-from enum import Enum, auto
+from enum import IntEnum, auto
 from typing import Protocol, Any, Callable
 
 
-class RecordMode(Enum):
+class RecordMode(IntEnum):
     """Recording mode for tape creation and updates"""
     NEW = auto()       # Record only when no match found, keep existing exchanges
     OVERWRITE = auto() # Replace exchange on match
     DISABLED = auto()  # Never write tapes, use fallback mode on miss
 
 
-class FallbackMode(Enum):
+class FallbackMode(IntEnum):
     """Fallback behavior when no tape matches"""
     NOT_FOUND = auto() # Raise TapeMissError when no tape found
     PROXY = auto()     # Run real program and optionally record
@@ -7,9 +7,15 @@ from pathlib import Path
 import hashlib
 import time
 import re
+from functools import lru_cache
 from typing import Any, Protocol, Optional
 from dataclasses import dataclass
 
+try:
+    import xxhash
+except ImportError:  # optional; hashlib.blake2b is used without it
+    xxhash = None
+
 
 class TapeNameGenerator(Protocol):
     """Protocol for tape name generation"""
@@ -18,6 +24,32 @@ class TapeNameGenerator(Protocol):
         ...
 
 
+_UNSAFE_CHARS_RE = re.compile(r'[^\w\-_]')
+
+
+@lru_cache(maxsize=256)
+def _sanitize(name: str) -> str:
+    """Make a program name or tag safe for use in paths (few distinct values per run)"""
+    return _UNSAFE_CHARS_RE.sub('_', name)
+
+
+def _new_hasher(data: bytes) -> Any:
+    """Hasher for name tags; read with hexdigest()[:8]. No cryptographic strength needed"""
+    if xxhash is not None:
+        return xxhash.xxh3_64(data)
+    # 4-byte digest = the 8 hex chars used in names
+    return hashlib.blake2b(data, digest_size=4)
+
+
+@lru_cache(maxsize=256)
+def _key_hasher(key: str) -> Any:
+    """
+    Hash state already fed with a session's fixed key parts.
+    Shared across calls, so copy() it before updating.
+    """
+    return _new_hasher(key.encode())
+
+
 @dataclass
 class DefaultTapeNameGenerator:
     """Default tape name generator using program/timestamp/hash pattern"""
@@ -37,9 +69,10 @@ class DefaultTapeNameGenerator:
             program = "unknown"
 
         # Sanitize program name for filesystem
-        program = re.sub(r'[^\w\-_]', '_', program)
+        program = _sanitize(program)
 
-        # Generate content hash for uniqueness
+        # Generate content hash for uniqueness; program/args/cwd are fixed for
+        # a session, so only the current input is hashed on each call
         key_parts = []
         if hasattr(context, 'program'):
             key_parts.append(context.program)
@@ -47,11 +80,11 @@ class DefaultTapeNameGenerator:
             key_parts.extend(context.args)
         if hasattr(context, 'cwd'):
             key_parts.append(context.cwd)
-        if hasattr(context, '_cur_input'):
-            key_parts.append(str(context._cur_input))
 
-        key = " ".join(str(p) for p in key_parts)
-        content_hash = hashlib.sha1(key.encode()).hexdigest()[:8]
+        hasher = _key_hasher(" ".join(str(p) for p in key_parts)).copy()
+        if hasattr(context, '_cur_input'):
+            hasher.update(f" {context._cur_input}".encode())
+        content_hash = hasher.hexdigest()[:8]
 
         # Generate timestamp
         timestamp = int(time.time() * 1000)
@@ -74,7 +107,7 @@ class SemanticTapeNameGenerator:
     def __call__(self, context: Any) -> Path:
         """Generate semantic tape names when possible"""
         program = Path(context.program).name if hasattr(context, 'program') else "unknown"
-        program = re.sub(r'[^\w\-_]', '_', program)
+        program = _sanitize(program)
 
         # Try to extract verb/action from args
         verb = None
@@ -93,7 +126,7 @@ class SemanticTapeNameGenerator:
         # Generate unique name
         timestamp = int(time.time() * 1000)
         key = f"{program} {context.args if hasattr(context, 'args') else ''}"
-        content_hash = hashlib.sha1(key.encode()).hexdigest()[:8]
+        content_hash = _key_hasher(key).hexdigest()[:8]
 
         if verb:
             tape_name = f"{verb}-{timestamp}-{content_hash}.json5"
@@ -116,7 +149,7 @@ class TaggedTapeNameGenerator:
     def __call__(self, context: Any) -> Path:
         """Generate tape name with optional tag"""
         program = Path(context.program).name if hasattr(context, 'program') else "unknown"
-        program = re.sub(r'[^\w\-_]', '_', program)
+        program = _sanitize(program)
 
         # Use tag from context or instance
         tag = None
@@ -127,7 +160,7 @@ class TaggedTapeNameGenerator:
 
         # Sanitize tag
         if tag:
-            tag = re.sub(r'[^\w\-_]', '_', tag)
+            tag = _sanitize(tag)
 
         # Build path
         tape_dir = self.root / program
@@ -136,7 +169,7 @@ class TaggedTapeNameGenerator:
         if tag:
             tape_name = f"{tag}-{timestamp}.json5"
         else:
-            content_hash = hashlib.sha1(str(context).encode()).hexdigest()[:8]
+            content_hash = _new_hasher(str(context).encode()).hexdigest()[:8]
             tape_name = f"unnamed-{timestamp}-{content_hash}.json5"
 
         return tape_dir / tape_name
\ No newline at end of file
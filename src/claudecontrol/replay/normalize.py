@@ -4,16 +4,26 @@ Handles ANSI codes, whitespace, timestamps, and other volatile data
 """
 
 import re
-from typing import List, Tuple, Optional
+import sys
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional
 
 
 # ANSI escape sequence pattern
 ANSI_RE = re.compile(r'\x1B(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])')
 
+# Two or more spaces, for collapse_whitespace
+_SPACE_RUN_RE = re.compile(r'  +')
+
+# Possessive quantifier (Python 3.11+) for unbounded runs that are followed by \b:
+# a shorter run could never satisfy the \b, so the engine need not retry one
+_POSSESSIVE = '+' if sys.version_info >= (3, 11) else ''
+
 # Common volatile patterns to scrub
 VOLATILE_PATTERNS: List[Tuple[re.Pattern, str]] = [
     # ISO timestamps
-    (re.compile(r'\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:\d{2})?\b'), '<TIMESTAMP>'),
+    (re.compile(r'\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+' + _POSSESSIVE + r')?(?:Z|[+-]\d{2}:\d{2})?\b'),
+     '<TIMESTAMP>'),
     # Unix timestamps (10-13 digits)
     (re.compile(r'\b1[0-9]{9,12}\b'), '<UNIX_TIME>'),
     # Hex IDs (7-40 chars, like git commits)
@@ -21,13 +31,13 @@ VOLATILE_PATTERNS: List[Tuple[re.Pattern, str]] = [
     # UUIDs
     (re.compile(r'\b[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}\b', re.I), '<UUID>'),
     # Memory addresses
-    (re.compile(r'\b0x[0-9a-fA-F]+\b'), '<ADDR>'),
+    (re.compile(r'\b0x[0-9a-fA-F]+' + _POSSESSIVE + r'\b'), '<ADDR>'),
     # PIDs (3-7 digit numbers in isolation)
     (re.compile(r'\bpid[:\s]*(\d{3,7})\b', re.I), 'pid:<PID>'),
     # Temporary file paths
     (re.compile(r'/tmp/[^\s]+'), '<TMPFILE>'),
     # Random temp names
-    (re.compile(r'\b(tmp|temp)[_-]?[a-zA-Z0-9]{6,}\b', re.I), '<TEMPNAME>'),
+    (re.compile(r'\b(tmp|temp)[_-]?[a-zA-Z0-9]{6,}' + _POSSESSIVE + r'\b', re.I), '<TEMPNAME>'),
 ]
 
 # Patterns for paths that should be normalized
@@ -38,27 +48,48 @@ PATH_PATTERNS = [
 ]
 
 
+def _fuse_patterns(patterns: List[Tuple[re.Pattern, str]]) -> Tuple[re.Pattern, Dict[str, str]]:
+    """
+    Combine (pattern, replacement) pairs into one alternation so text is scanned once.
+    Earlier patterns win where several match at the same position.
+    """
+    parts = []
+    replacements = {}
+    for i, (pattern, replacement) in enumerate(patterns):
+        source = f'(?i:{pattern.pattern})' if pattern.flags & re.I else pattern.pattern
+        parts.append(f'(?P<g{i}>{source})')
+        replacements[f'g{i}'] = replacement
+    return re.compile('|'.join(parts)), replacements
+
+
+_VOLATILE_RE, _VOLATILE_REPL = _fuse_patterns(VOLATILE_PATTERNS)
+_PATH_RE, _PATH_REPL = _fuse_patterns(PATH_PATTERNS)
+
+
 def strip_ansi(text: str) -> str:
     """Remove ANSI escape sequences from text"""
+    # Every sequence starts with ESC; a C-level scan for it skips the regex on plain text
+    if '\x1b' not in text:
+        return text
     return ANSI_RE.sub('', text)
 
 
 def collapse_whitespace(text: str) -> str:
     """Collapse multiple whitespace characters to single space"""
-    # Replace tabs with spaces
-    text = text.replace('\t', ' ')
-    # Collapse multiple spaces
-    text = re.sub(r' +', ' ', text)
+    # Replace tabs with spaces; substring checks skip passes that would change nothing
+    if '\t' in text:
+        text = text.replace('\t', ' ')
+    # Collapse runs of spaces (single spaces are left alone)
+    if '  ' in text:
+        text = _SPACE_RUN_RE.sub(' ', text)
     # Remove trailing whitespace from lines
-    lines = text.splitlines()
-    lines = [line.rstrip() for line in lines]
-    return '\n'.join(lines)
+    return '\n'.join([line.rstrip() for line in text.splitlines()])
 
 
 def scrub_volatile(text: str, patterns: Optional[List[Tuple[re.Pattern, str]]] = None) -> str:
     """Replace volatile patterns with placeholders"""
     if patterns is None:
-        patterns = VOLATILE_PATTERNS
+        return _VOLATILE_RE.sub(lambda m: _VOLATILE_REPL[m.lastgroup], text)
 
     for pattern, replacement in patterns:
         text = pattern.sub(replacement, text)
@@ -68,13 +99,19 @@ def scrub_volatile(text: str, patterns: Optional[List[Tuple[re.Pattern, str]]] =
 
 def normalize_paths(text: str) -> str:
     """Normalize user-specific paths"""
-    for pattern, replacement in PATH_PATTERNS:
-        text = pattern.sub(replacement, text)
-    return text
+    # Every PATH_PATTERNS match starts with one of these literals; substring
+    # checks are far cheaper than a regex pass over text with no user paths
+    if '/home/' not in text and '/Users/' not in text and 'C:\\Users\\' not in text:
+        return text
+    # Replacements are literal text, so backslashes in them are not template escapes
+    return _PATH_RE.sub(lambda m: _PATH_REPL[m.lastgroup], text)
 
 
 def normalize_line_endings(text: str) -> str:
     """Normalize line endings to \n"""
+    # Most text has no carriage returns at all; skip both copying passes
+    if '\r' not in text:
+        return text
     text = text.replace('\r\n', '\n')
     text = text.replace('\r', '\n')
     return text
@@ -109,6 +146,24 @@ def normalize_for_display(text: str) -> str:
     return normalize_line_endings(text)
 
 
+@lru_cache(maxsize=4096)
+def _normalize_cached(config: Tuple[bool, bool, bool, bool, Tuple[Tuple[re.Pattern, str], ...]],
+                      text: str) -> str:
+    """Normalizer.normalize body, memoized on (config, text)"""
+    strip_ansi_codes, collapse_ws, scrub_volatiles, normalize_path, custom_patterns = config
+    if strip_ansi_codes:
+        text = strip_ansi(text)
+    if collapse_ws:
+        text = collapse_whitespace(text)
+    if scrub_volatiles:
+        patterns = VOLATILE_PATTERNS + list(custom_patterns) if custom_patterns else None
+        text = scrub_volatile(text, patterns)
+    if normalize_path:
+        text = normalize_paths(text)
+
+    return normalize_line_endings(text)
+
+
 class Normalizer:
     """Configurable normalizer for matching contexts"""
 
@@ -126,17 +181,10 @@ class Normalizer:
 
     def normalize(self, text: str) -> str:
         """Apply configured normalizations"""
-        if self.strip_ansi:
-            text = strip_ansi(text)
-        if self.collapse_ws:
-            text = collapse_whitespace(text)
-        if self.scrub_volatile:
-            patterns = VOLATILE_PATTERNS + self.custom_patterns
-            text = scrub_volatile(text, patterns)
-        if self.normalize_paths:
-            text = normalize_paths(text)
-
-        return normalize_line_endings(text)
+        # The config is read on each call, so changed settings never hit stale entries
+        config = (self.strip_ansi, self.collapse_ws, self.scrub_volatile,
+                  self.normalize_paths, tuple(self.custom_patterns))
+        return _normalize_cached(config, text)
 
     def build_key(self, *parts: str) -> str:
         """Build a normalized key from multiple parts"""
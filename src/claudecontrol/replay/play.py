@@ -4,22 +4,47 @@ Provides tape-based I/O instead of real process interaction
 """
 
 import re
-import base64
+import sys
+import codecs
 import time
+import logging
 import threading
-from typing import Optional, Union, List, Any, Dict
+from functools import lru_cache
+from itertools import accumulate
+from pathlib import Path
+from typing import Optional, Union, List, Any, Dict, Tuple
 from dataclasses import dataclass, field
 import queue
+import random
+import signal
+import subprocess
 import pexpect
+from pexpect.popen_spawn import PopenSpawn
 
 from .store import TapeStore
 from .model import Tape, Exchange
-from .matchers import MatchingContext, CompositeMatcher
+from .matchers import (
+    MatchingContext, CompositeMatcher, DefaultCommandMatcher, DefaultStdinMatcher, TapeIndex, LazyContext
+)
 from .modes import FallbackMode
 from .exceptions import TapeMissError, PlaybackError
 from .latency import LatencyPolicy, apply_latency
 from .errors import ErrorInjectionPolicy
 
+logger = logging.getLogger(__name__)
+
+
+@lru_cache(maxsize=512)
+def _compile_pattern(pattern: str, as_bytes: bool) -> re.Pattern:
+    """Compile an expect pattern; callers repeat the same prompts all session"""
+    return re.compile(pattern.encode() if as_bytes else pattern)
+
+
+@lru_cache(maxsize=1024)
+def _compile_literal(literal: str, as_bytes: bool) -> re.Pattern:
+    """Compile an expect_exact string as an escaped literal pattern"""
+    return re.compile(re.escape(literal.encode() if as_bytes else literal))
+
 
 class Transport:
     """Abstract base for process transports"""
@@ -85,7 +110,16 @@ class ReplayTransport(Transport):
     _closed: bool = field(default=False, init=False)
     _buffer: bytearray = field(default_factory=bytearray, init=False)
     _buffer_lock: threading.Lock = field(default_factory=threading.Lock, init=False)
+    _buffer_cv: Optional[threading.Condition] = field(default=None, init=False)
+    # Encoding mode only: buffer contents decoded as they arrive
+    _text_parts: List[str] = field(default_factory=list, init=False)
+    _decoder: Optional[codecs.IncrementalDecoder] = field(default=None, init=False)
     _live_transport: Optional['LiveTransport'] = field(default=None, init=False)
+    _error_rng: Optional[random.Random] = field(default=None, init=False)
+    _tape_index: Optional[TapeIndex] = field(default=None, init=False)
+    _indexed_generation: int = field(default=-1, init=False)
+    _path_by_tape: Dict[int, Path] = field(default_factory=dict, init=False)
+    _by_scan_key: Optional[Dict[Tuple[Optional[str], Any], List[Tuple[Tape, Exchange]]]] = field(default=None, init=False)
 
     # pexpect compatibility
     before: Optional[bytes] = field(default=None, init=False)
@@ -96,10 +130,18 @@ class ReplayTransport(Transport):
 
     def __post_init__(self):
         """Initialize replay transport"""
+        # Signalled (under _buffer_lock) whenever the buffer grows or replay state changes
+        self._buffer_cv = threading.Condition(self._buffer_lock)
+        if self.encoding:
+            # Decoding per chunk keeps multi-byte characters split across chunks intact
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='ignore')
+
         # Load tapes if not already loaded
         if not self.store.tapes:
             self.store.load_all()
 
+        self._index_tapes()
+
         if not self.latency_policy:
             from .latency import LATENCY_REALISTIC
             self.latency_policy = LATENCY_REALISTIC
@@ -107,6 +149,8 @@ class ReplayTransport(Transport):
         if not self.error_policy:
             from .errors import ERROR_NONE
             self.error_policy = ERROR_NONE
+        # Draw state lives here, not on the (possibly shared preset) policy
+        self._error_rng = self.error_policy.new_rng()
 
     def send(self, data: bytes) -> int:
         """Send data and trigger replay of matching exchange"""
@@ -124,6 +168,7 @@ class ReplayTransport(Transport):
         exchange = self._find_exchange(data, context)
 
         if not exchange:
+            logger.debug("No tape matched input %r for context %s", data, LazyContext(context))
             if self.fallback_mode == FallbackMode.NOT_FOUND:
                 raise TapeMissError(f"No tape found for input", {'context': context.to_dict()})
             else:
@@ -132,7 +177,7 @@ class ReplayTransport(Transport):
                 return self._live_transport.send(data)
 
         # Start streaming output chunks
-        self._stream_output(exchange)
+        self._stream_output(exchange, context)
 
         return len(data)
 
@@ -148,31 +193,45 @@ class ReplayTransport(Transport):
         """
         if isinstance(patterns, str):
             patterns = [patterns]
+        return self._expect(patterns, timeout)
 
+    def _expect(self, patterns: List[Any], timeout: Optional[int], overlap: Optional[int] = None) -> int:
+        """
+        Search the buffer for patterns until one matches or timeout.
+        With an overlap, each rescan resumes that many characters before the
+        previously scanned end instead of at 0; only valid for bounded-length patterns.
+        """
         # Compile patterns
-        compiled_patterns = []
-        for p in patterns:
-            if isinstance(p, str):
-                compiled_patterns.append(re.compile(p.encode() if not self.encoding else p))
-            else:
-                compiled_patterns.append(p)
+        as_bytes = not self.encoding
+        compiled_patterns = [
+            _compile_pattern(p, as_bytes) if isinstance(p, str) else p
+            for p in patterns
+        ]
 
         # Wait for pattern match
-        start_time = time.time()
         timeout = timeout or 30
+        deadline = time.monotonic() + timeout
+        scan_from = 0
 
-        while time.time() - start_time < timeout:
+        while True:
             # Check if we switched to live transport
             if self._live_transport:
-                return self._live_transport.expect(patterns, timeout - (time.time() - start_time))
+                return self._live_transport.expect(patterns, deadline - time.monotonic())
 
             # Check buffer for matches with thread safety
-            with self._buffer_lock:
-                buffer_str = self._buffer if not self.encoding else self._buffer.decode('utf-8', errors='ignore')
+            with self._buffer_cv:
+                if self.encoding:
+                    # Join decoded chunks only when new ones arrived
+                    parts = self._text_parts
+                    if len(parts) > 1:
+                        parts[:] = [''.join(parts)]
+                    buffer_str = parts[0] if parts else ''
+                else:
+                    buffer_str = self._buffer
 
                 for i, pattern in enumerate(compiled_patterns):
                     if hasattr(pattern, 'search'):
-                        match = pattern.search(buffer_str)
+                        match = pattern.search(buffer_str, scan_from)
                         if match:
                             # Set pexpect-compatible attributes
                             self.match = match
@@ -181,20 +240,30 @@ class ReplayTransport(Transport):
                                 self.before = buffer_str[:match.start()].encode()
                                 self.after = buffer_str[match.start():match_end].encode()
                                 # Remove matched portion from buffer
-                                self._buffer = bytearray(buffer_str[match_end:].encode())
+                                rest = buffer_str[match_end:]
+                                self._text_parts[:] = [rest] if rest else []
+                                self._buffer = bytearray(rest.encode())
                             else:
-                                self.before = bytes(self._buffer[:match.start()])
-                                self.after = bytes(self._buffer[match.start():match_end])
-                                # Remove matched portion from buffer
+                                # Slice through a view so each part is copied once
+                                with memoryview(self._buffer) as view:
+                                    self.before = bytes(view[:match.start()])
+                                    self.after = bytes(view[match.start():match_end])
+                                # Rebind rather than trim in place: match.string is this bytearray
                                 self._buffer = self._buffer[match_end:]
                             return i
 
-            # Check if process has ended
-            if self.exitstatus is not None:
-                raise PlaybackError("Process ended before match")
+                if overlap is not None:
+                    scan_from = max(0, len(buffer_str) - overlap)
 
-            # Small sleep to avoid busy waiting
-            time.sleep(0.01)
+                # Check if process has ended
+                if self.exitstatus is not None:
+                    raise PlaybackError("Process ended before match")
+
+                # Sleep until the streamer adds output rather than polling
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._buffer_cv.wait(remaining)
 
         # Timeout
         with self._buffer_lock:
@@ -206,9 +275,20 @@ class ReplayTransport(Transport):
         if isinstance(patterns, str):
             patterns = [patterns]
 
-        # Convert to regex with escaped special chars
-        escaped = [re.escape(p) for p in patterns]
-        return self.expect(escaped, timeout)
+        # A literal can straddle the end of the last scan by at most len - 1
+        overlap = max((len(p.encode() if isinstance(p, str) else p) for p in patterns), default=1) - 1
+
+        # Live processes handle their own exact matching
+        if self._live_transport:
+            return self._live_transport.expect_exact(patterns, timeout)
+
+        # Escape and compile each literal once per session, not per call
+        as_bytes = not self.encoding
+        compiled = [
+            _compile_literal(p, as_bytes) if isinstance(p, str) else re.compile(re.escape(p))
+            for p in patterns
+        ]
+        return self._expect(compiled, timeout, overlap)
 
     def isalive(self) -> bool:
         """Check if replay is still active"""
@@ -219,7 +299,10 @@ class ReplayTransport(Transport):
     def close(self, force: bool = False) -> None:
         """Close the replay transport"""
         self._closed = True
+        with self._buffer_cv:
+            self._buffer_cv.notify_all()
         if self._output_thread and self._output_thread.is_alive():
+            self._output_queue.put(None)
             self._output_thread.join(timeout=1)
 
     def _build_context(self) -> MatchingContext:
@@ -237,8 +320,48 @@ class ReplayTransport(Transport):
             exchange_index=self._exchange_index
         )
 
+    def _index_tapes(self) -> None:
+        """Build lookup structures over the store's loaded tapes"""
+        # Read the generation first: a reload racing with this build bumps it again
+        self._indexed_generation = self.store.generation
+        tapes = self.store.tapes
+
+        # Index recorded exchanges for the default matchers
+        self._tape_index = self.matcher.build_index(tapes)
+
+        # Tape file paths by tape identity, for marking matched tapes as used
+        self._path_by_tape = {id(tape): path for tape, path in zip(tapes, self.store.paths)}
+
+        # Group exchanges by scan key so the full scan only visits candidates
+        # that can pass the default matchers
+        if self._scan_key('', b'') == (None, None):
+            self._by_scan_key = None
+        else:
+            self._by_scan_key = {}
+            for tape in tapes:
+                for exchange in tape.exchanges:
+                    data_text = exchange.input.data_text
+                    key = self._scan_key(tape.meta.program, data_text.encode('utf-8') if data_text else b'')
+                    self._by_scan_key.setdefault(key, []).append((tape, exchange))
+
+    def _scan_key(self, program: str, input_data: bytes) -> Tuple[Optional[str], Any]:
+        """
+        Prefilter key for the full matcher scan.
+        The default command matcher requires equal program names and the default
+        stdin matcher reduces to key equality; a custom matcher leaves its part None.
+        """
+        stdin_matcher = self.matcher.stdin_matcher
+        return (
+            Path(program).name if type(self.matcher.command_matcher) is DefaultCommandMatcher else None,
+            stdin_matcher.key(input_data) if type(stdin_matcher) is DefaultStdinMatcher else None,
+        )
+
     def _find_exchange(self, input_data: bytes, context: MatchingContext) -> Optional[Exchange]:
         """Find matching exchange in loaded tapes"""
+        # Rebuild the lookup structures if the store reloaded its tapes
+        if self._indexed_generation != self.store.generation:
+            self._index_tapes()
+
         # Try to find exact match first
         input_text = input_data.decode('utf-8', errors='ignore')
         result = self.store.find_exchange(
@@ -254,64 +377,123 @@ class ReplayTransport(Transport):
             self._current_exchange = exchange
             return exchange
 
-        # Try matcher-based search
-        for tape in self.store.tapes:
-            for exchange in tape.exchanges:
-                if self.matcher.match_exchange(tape, exchange, context, input_data):
-                    self._current_tape = tape
-                    self._current_exchange = exchange
-                    # Mark tape as used
-                    if tape in self.store.tapes:
-                        idx = self.store.tapes.index(tape)
-                        if idx < len(self.store.paths):
-                            self.store.mark_used(self.store.paths[idx])
-                    return exchange
+        # Use the matcher index when the matchers allow one; a miss there is final.
+        # Custom matchers fall back to a full matcher-based search
+        if self._tape_index is not None:
+            match = self._tape_index.lookup(context, input_data)
+        else:
+            if self._by_scan_key is not None:
+                candidates = self._by_scan_key.get(self._scan_key(self.program, input_data), ())
+            else:
+                candidates = ((tape, exchange) for tape in self.store.tapes for exchange in tape.exchanges)
+            match = next(
+                ((tape, exchange)
+                 for tape, exchange in candidates
+                 if self.matcher.match_exchange(tape, exchange, context, input_data)),
+                None
+            )
+
+        if match:
+            tape, exchange = match
+            self._current_tape = tape
+            self._current_exchange = exchange
+            # Mark tape as used
+            path = self._path_by_tape.get(id(tape))
+            if path is not None:
+                self.store.mark_used(path)
+            return exchange
 
         return None
 
-    def _stream_output(self, exchange: Exchange) -> None:
-        """Stream output chunks from exchange to buffer"""
-        def stream_chunks():
-            # Check for error injection
-            if self.error_policy and self.error_policy.should_fail(self._build_context()):
-                truncate_at = self.error_policy.get_truncation_point(len(exchange.output.chunks))
-                chunks_to_play = exchange.output.chunks[:truncate_at]
-            else:
-                chunks_to_play = exchange.output.chunks
+    def _stream_output(self, exchange: Exchange, context: MatchingContext) -> None:
+        """Queue exchange output for the streamer thread, using the context built by send()"""
+        # Decide error injection once, so truncation and exit status agree
+        inject_error = bool(self.error_policy and self.error_policy.should_fail(context, self._error_rng))
 
-            # Stream chunks with latency
-            for chunk in chunks_to_play:
-                if self._closed:
-                    break
+        # One long-lived streamer plays exchanges in send order
+        self._output_queue.put((exchange, context, inject_error))
+        if self._output_thread is None:
+            self._output_thread = threading.Thread(target=self._streamer_loop, daemon=True)
+            self._output_thread.start()
 
-                # Apply latency
-                delay = self.latency_policy.get_chunk_delay(chunk.delay_ms, self._build_context())
-                if delay > 0:
-                    time.sleep(delay / 1000.0)
+        # Increment exchange index
+        self._exchange_index += 1
 
-                # Decode and add to buffer with thread safety
-                data = base64.b64decode(chunk.data_b64)
-                with self._buffer_lock:
-                    self._buffer.extend(data)
+    def _streamer_loop(self) -> None:
+        """Play queued exchanges until close() sends the None sentinel"""
+        while True:
+            item = self._output_queue.get()
+            if item is None:
+                return
+            try:
+                self._play_exchange(*item)
+            except Exception:
+                # Keep the streamer alive for later exchanges
+                logger.exception("Failed to stream replayed output")
+
+    def _play_exchange(self, exchange: Exchange, context: MatchingContext, inject_error: bool) -> None:
+        """Stream output chunks from exchange to buffer"""
+        # Check for error injection
+        if inject_error:
+            truncate_at = self.error_policy.get_truncation_point(len(exchange.output.chunks))
+            chunks_to_play = exchange.output.chunks[:truncate_at]
+        else:
+            chunks_to_play = exchange.output.chunks
+
+        # Resolve all chunk delays up front
+        delays = self.latency_policy.precompute_delays(
+            [chunk.delay_ms for chunk in chunks_to_play], context
+        )
 
+        # Group each delayed chunk with the undelayed chunks that follow it;
+        # a burst is written in one buffer update instead of one per chunk
+        bursts: List[Tuple[int, bool, List[bytes]]] = []
+        for chunk, delay, offset_ms in zip(chunks_to_play, delays, accumulate(delays)):
+            if delay > 0 or not bursts:
+                bursts.append((offset_ms, delay > 0, [chunk.data]))
+            else:
+                bursts[-1][2].append(chunk.data)
+
+        # Stream bursts against absolute deadlines so sleep overshoot doesn't accumulate;
+        # offsets are a running sum of the delays computed in one pass
+        start = time.monotonic()
+        for offset_ms, delayed, parts in bursts:
+            if self._closed:
+                break
+
+            # Apply latency
+            if delayed:
+                remaining = start + offset_ms / 1000.0 - time.monotonic()
+                if remaining > 0:
+                    time.sleep(remaining)
+
+            # Add to buffer with thread safety (chunk data is decoded at load)
+            data = parts[0] if len(parts) == 1 else b''.join(parts)
+            with self._buffer_cv:
+                self._append_output(data)
+
+        with self._buffer_cv:
             # Set exit status if exchange ended process
             if exchange.exit:
                 self.exitstatus = exchange.exit.get('code', 0)
                 self.signalstatus = exchange.exit.get('signal')
 
             # Handle error injection
-            if self.error_policy and self.error_policy.should_fail(self._build_context()):
+            if inject_error:
                 self.exitstatus = self.error_policy.exit_code
                 error_msg = f"\n{self.error_policy.error_message}\n"
-                with self._buffer_lock:
-                    self._buffer.extend(error_msg.encode())
+                self._append_output(error_msg.encode())
 
-        # Start streaming in background thread
-        self._output_thread = threading.Thread(target=stream_chunks, daemon=True)
-        self._output_thread.start()
+            self._buffer_cv.notify_all()
 
-        # Increment exchange index
-        self._exchange_index += 1
+    def _append_output(self, data: bytes) -> None:
+        """Add output to the buffer and wake waiters; caller holds _buffer_lock"""
+        self._buffer.extend(data)
+        if self._decoder:
+            text = self._decoder.decode(data)
+            if text:
+                self._text_parts.append(text)
+        self._buffer_cv.notify_all()
 
     def _switch_to_live_transport(self) -> None:
         """Switch from replay to live transport when tape miss occurs in PROXY mode"""
@@ -330,7 +512,8 @@ class ReplayTransport(Transport):
                 cwd=self.cwd,
                 env=self.env,
                 encoding=self.encoding,
-                echo=False
+                echo=False,
+                use_poll=_USE_POLL
             )
             self._live_transport = LiveTransport(spawn_obj)
 
@@ -344,6 +527,10 @@ class ReplayTransport(Transport):
             raise PlaybackError(f"Failed to spawn live process for fallback: {e}")
 
 
+# poll() has no FD_SETSIZE limit on child fds; macOS poll() does not support ttys
+_USE_POLL = sys.platform.startswith('linux')
+
+
 class LiveTransport(Transport):
     """
     Wrapper around pexpect.spawn for live process execution.
@@ -390,10 +577,21 @@ class LiveTransport(Transport):
 
     def isalive(self) -> bool:
         """Check if real process is alive"""
+        if isinstance(self.spawn, PopenSpawn):
+            return self.spawn.proc.poll() is None
         return self.spawn.isalive()
 
     def close(self, force: bool = False) -> None:
         """Close real process"""
-        self.spawn.close(force)
+        if isinstance(self.spawn, PopenSpawn):
+            # Pipes have no hangup: send EOF, then signal if the child does not exit promptly
+            self.spawn.sendeof()
+            try:
+                self.spawn.proc.wait(timeout=0 if force else 0.1)
+            except subprocess.TimeoutExpired:
+                self.spawn.kill(signal.SIGKILL if force else signal.SIGTERM)
+            self.spawn.wait()
+        else:
+            self.spawn.close(force)
         self.exitstatus = self.spawn.exitstatus
         self.signalstatus = self.spawn.signalstatus
\ No newline at end of file
@@ -4,12 +4,17 @@ Captures process I/O as timestamped chunks for replay
 """
 
 import time
-import base64
+from itertools import starmap
 from pathlib import Path
 from dataclasses import dataclass, field
-from typing import Optional, Any, List, Dict
+from typing import Optional, Any, List, Dict, Tuple
 from datetime import datetime
 
+try:
+    import pybase64 as base64
+except ImportError:  # optional SIMD base64 with the stdlib API
+    import base64
+
 from .model import Tape, TapeMeta, Exchange, IOInput, IOOutput, Chunk
 from .modes import RecordMode
 from .namegen import DefaultTapeNameGenerator
@@ -19,18 +24,39 @@ from .decorators import DecoratorSet
 from .matchers import MatchingContext
 
 
+_monotonic_ns = time.monotonic_ns
+
+
+def _is_utf8(data: bytes) -> bool:
+    """Strict UTF-8 validity check"""
+    try:
+        data.decode('utf-8', errors='strict')
+    except UnicodeDecodeError:
+        return False
+    return True
+
+
 class ChunkSink:
     """
     Capture output chunks with timestamps.
     Implements write/flush interface for pexpect.logfile_read.
     """
 
+    # write() runs once per read from the child, so keep attribute access cheap
+    __slots__ = ('_last_time', '_raw', 'total_bytes')
+
     def __init__(self):
         """Initialize chunk sink"""
-        self._last_time = time.monotonic()
-        self.chunks: List[Chunk] = []
+        self._last_time = _monotonic_ns()
+        # (delay_ms, data, is_utf8) per write; Chunk objects are built in to_output()
+        self._raw: List[Tuple[int, bytes, bool]] = []
         self.total_bytes = 0
 
+    @property
+    def chunks(self) -> List[Chunk]:
+        """Chunks captured so far"""
+        return list(starmap(Chunk, self._raw))
+
     def write(self, data: bytes | str) -> None:
         """
         Called by pexpect for each chunk of output.
@@ -39,32 +65,26 @@ class ChunkSink:
         # Handle both bytes and string input with error handling
         if isinstance(data, str):
             data_bytes = data.encode('utf-8', errors='replace')
+            # Freshly encoded text is valid UTF-8 by construction
+            is_utf8 = True
         else:
             data_bytes = data
+            is_utf8 = None
 
         if not data_bytes:
             return
 
         # Calculate delay since last chunk
-        now = time.monotonic()
-        delay_ms = int((now - self._last_time) * 1000)
+        now = _monotonic_ns()
+        delay_ms = (now - self._last_time) // 1_000_000
         self._last_time = now
 
-        # Check if data is valid UTF-8
-        is_utf8 = True
-        try:
-            data_bytes.decode('utf-8', errors='strict')
-        except UnicodeDecodeError:
-            is_utf8 = False
-
-        # Create chunk
-        chunk = Chunk(
-            delay_ms=delay_ms,
-            data_b64=base64.b64encode(data_bytes).decode('ascii'),
-            is_utf8=is_utf8
-        )
+        # Check if data is valid UTF-8; terminal output is mostly ASCII, which
+        # isascii() confirms in one C pass without building a throwaway str
+        if is_utf8 is None:
+            is_utf8 = data_bytes.isascii() or _is_utf8(data_bytes)
 
-        self.chunks.append(chunk)
+        self._raw.append((delay_ms, data_bytes, is_utf8))
         self.total_bytes += len(data_bytes)
 
     def flush(self) -> None:
@@ -72,14 +92,15 @@ class ChunkSink:
         pass
 
     def to_output(self) -> IOOutput:
-        """Convert captured chunks to IOOutput"""
-        return IOOutput(chunks=self.chunks.copy())
+        """Convert captured chunks to IOOutput, handing them over and starting a fresh list"""
+        raw, self._raw = self._raw, []
+        return IOOutput(chunks=list(starmap(Chunk, raw)))
 
     def reset(self) -> None:
         """Reset for new exchange"""
-        self.chunks.clear()
+        self._raw.clear()
         self.total_bytes = 0
-        self._last_time = time.monotonic()
+        self._last_time = _monotonic_ns()
 
 
 @dataclass
@@ -99,9 +120,14 @@ class Recorder:
     # Internal state
     _sink: Optional[ChunkSink] = field(default=None, init=False)
     _current_tape: Optional[Tape] = field(default=None, init=False)
-    _start_time: float = field(default=0, init=False)
+    _start_time: int = field(default=0, init=False)
     _current_exchange: Optional[Exchange] = field(default=None, init=False)
     _recording_started: bool = field(default=False, init=False)
+    # Session attributes snapshotted at start(); they do not change while recording
+    _program: str = field(default='unknown', init=False)
+    _args: List[str] = field(default_factory=list, init=False)
+    _env: Dict[str, str] = field(default_factory=dict, init=False)
+    _cwd: str = field(default='', init=False)
 
     def __post_init__(self):
         """Initialize recorder"""
@@ -122,6 +148,7 @@ class Recorder:
 
         # Create and attach chunk sink
         self._sink = ChunkSink()
+        self._snapshot_session()
 
         # Attach to pexpect's logfile_read
         if hasattr(self.session, 'process') and self.session.process:
@@ -141,6 +168,7 @@ class Recorder:
 
         # Create chunk sink
         self._sink = ChunkSink()
+        self._snapshot_session()
 
         # Add to composite logfile
         if hasattr(composite_logfile, 'add_handler'):
@@ -193,14 +221,21 @@ class Recorder:
         # Finalize exchange
         self._finalize_exchange()
 
+    def _snapshot_session(self) -> None:
+        """Cache the session attributes used by every exchange"""
+        self._program = getattr(self.session, 'command', 'unknown')
+        self._args = getattr(self.session, 'args', [])
+        self._env = dict(getattr(self.session, 'env', None) or {})
+        self._cwd = str(getattr(self.session, 'cwd', Path.cwd()))
+
     def _init_tape(self) -> None:
         """Initialize a new tape"""
         meta = TapeMeta(
             created_at=datetime.now().isoformat() + 'Z',
-            program=getattr(self.session, 'command', 'unknown'),
-            args=getattr(self.session, 'args', []),
-            env=dict(getattr(self.session, 'env', None) or {}),
-            cwd=str(getattr(self.session, 'cwd', Path.cwd())),
+            program=self._program,
+            args=self._args,
+            env=dict(self._env),
+            cwd=self._cwd,
             pty={'rows': 24, 'cols': 80}  # Default, can be overridden
         )
 
@@ -252,7 +287,7 @@ class Recorder:
             annotations={}
         )
 
-        self._start_time = time.monotonic()
+        self._start_time = _monotonic_ns()
 
     def _finalize_exchange(self) -> None:
         """Finalize and add current exchange to tape"""
@@ -264,8 +299,7 @@ class Recorder:
 
         # Calculate duration
         if self._start_time:
-            duration = time.monotonic() - self._start_time
-            self._current_exchange.dur_ms = int(duration * 1000)
+            self._current_exchange.dur_ms = (_monotonic_ns() - self._start_time) // 1_000_000
 
         # Add to tape
         if self._current_tape:
@@ -286,19 +320,16 @@ class Recorder:
         tape_dict = self._current_tape.to_dict()
         tape_dict = self.decorators.decorate_tape(ctx, tape_dict)
 
-        # Create new Tape from decorated dict
-        self._current_tape = Tape.from_dict(tape_dict)
-
-        # Save with redaction
-        self.store.save_tape(self._current_tape, tape_path, self.redactor)
+        # Save the decorated dict with redaction (no round-trip through Tape)
+        self.store.save_tape(tape_dict, tape_path, self.redactor)
 
     def _build_context(self, prompt: str) -> MatchingContext:
-        """Build matching context for decorators"""
+        """Build matching context for decorators (env is shared; treat it as read-only)"""
         return MatchingContext(
-            program=getattr(self.session, 'command', 'unknown'),
-            args=getattr(self.session, 'args', []),
-            env=dict(getattr(self.session, 'env', None) or {}),
-            cwd=str(getattr(self.session, 'cwd', Path.cwd())),
+            program=self._program,
+            args=self._args,
+            env=self._env,
+            cwd=self._cwd,
             prompt=prompt,
             exchange_index=len(self._current_tape.exchanges) if self._current_tape else 0
         )
\ No newline at end of file
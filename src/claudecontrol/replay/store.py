@@ -5,18 +5,28 @@ Handles loading, saving, and matching tapes
 
 from pathlib import Path
 import threading
-from typing import List, Dict, Tuple, Optional, Set, Any
+from typing import List, Dict, Tuple, Optional, Set, Any, Union
 import pyjson5
 import portalocker
 import tempfile
-import shutil
+import os
+from concurrent.futures import ThreadPoolExecutor
 
-from .model import Tape, TapeMeta, Exchange
+try:
+    import orjson
+except ImportError:  # optional; tapes are then parsed with the stdlib decoder
+    orjson = None
+
+from .model import Tape, TapeMeta, Exchange, iter_tape_json_bytes
 from .normalize import Normalizer
 from .exceptions import SchemaError, TapeMissError
 from .redact import SecretRedactor
 
 
+# Upper bound on threads reading tapes in load_all
+_LOAD_WORKERS = 16
+
+
 class TapeStore:
     """Thread-safe tape storage with index"""
 
@@ -28,8 +38,11 @@ class TapeStore:
         self._lock = threading.RLock()
         self.used: Set[Path] = set()
         self.new: Set[Path] = set()
-        self._index: Optional[Dict] = None
+        self._index: Optional[Dict[Tuple[str, ...], Tuple[int, int]]] = None
         self._normalizer = Normalizer()
+        self._tape_keys: Dict[Tuple[str, Tuple[str, ...]], Tuple[str, str]] = {}
+        # Bumped whenever the loaded tapes change, so dependent indexes can rebuild
+        self.generation = 0
 
     def load_all(self) -> None:
         """Load all tapes from directory recursively"""
@@ -38,60 +51,117 @@ class TapeStore:
             self.paths.clear()
 
             if not self.root.exists():
+                self._index = None
+                self.generation += 1
                 return
 
-            for tape_path in self.root.rglob("*.json5"):
-                try:
-                    tape = self.load_tape(tape_path)
+            # Reads overlap across threads; results keep directory walk order
+            tape_paths = list(self.root.rglob("*.json5"))
+            with ThreadPoolExecutor(max_workers=min(_LOAD_WORKERS, len(tape_paths) or 1)) as pool:
+                tapes = list(pool.map(self._load_tape_safe, tape_paths))
+
+            for tape_path, tape in zip(tape_paths, tapes):
+                if tape is not None:
                     self.tapes.append(tape)
                     self.paths.append(tape_path)
-                except Exception as e:
-                    print(f"Warning: Failed to load tape {tape_path}: {e}")
 
             # Build index after loading
             self._build_index()
+            self.generation += 1
+
+    def count_tapes(self) -> int:
+        """Count tape files under root without parsing them"""
+        if not self.root.exists():
+            return 0
+
+        count = 0
+        stack = [str(self.root)]
+        while stack:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.name.endswith(".json5"):
+                        count += 1
+        return count
+
+    def load_meta_only(self, path: Path) -> TapeMeta:
+        """Load a single tape and return just its meta block"""
+        return self.load_tape(path).meta
+
+    def _load_tape_safe(self, path: Path) -> Optional[Tape]:
+        """Load a tape, warning and returning None if it cannot be read"""
+        try:
+            return self.load_tape(path)
+        except Exception as e:
+            print(f"Warning: Failed to load tape {path}: {e}")
+            return None
 
     def load_tape(self, path: Path) -> Tape:
         """Load a single tape from file"""
-        with open(path, 'r', encoding='utf-8') as f:
-            data = pyjson5.load(f)
+        with open(path, 'rb') as f:
+            raw = f.read()
+        return self._parse_tape(path, raw)
+
+    def _parse_tape(self, path: Path, raw: bytes) -> Tape:
+        """Parse tape file contents"""
+        # Tapes we write are strict JSON: orjson parses the bytes directly, or
+        # without it each exchange is converted as it is decoded; hand-edited
+        # JSON5 falls back to pyjson5
+        if orjson is not None:
+            try:
+                data = orjson.loads(raw)
+            except orjson.JSONDecodeError:
+                data = pyjson5.loads(raw.decode('utf-8'))
+        else:
+            text = raw.decode('utf-8')
+            try:
+                return Tape.from_json_text(text)
+            except ValueError:
+                # JSON5-only syntax; a bad shape is re-reported by from_dict below
+                data = pyjson5.loads(text)
+            except Exception as e:
+                raise SchemaError(f"Invalid tape format: {e}", str(path))
 
         try:
             return Tape.from_dict(data)
         except Exception as e:
             raise SchemaError(f"Invalid tape format: {e}", str(path))
 
-    def save_tape(self, tape: Tape, path: Path, redactor: Optional[SecretRedactor] = None) -> Path:
-        """Save tape to file with atomic write"""
+    def save_tape(self, tape: Union[Tape, Dict[str, Any]], path: Path,
+                  redactor: Optional[SecretRedactor] = None) -> Path:
+        """Save tape (a Tape or an already-converted tape dict) to file with atomic write"""
         path = Path(path)
         path.parent.mkdir(parents=True, exist_ok=True)
 
-        # Convert to dict
-        tape_dict = tape.to_dict()
-
-        # Apply redaction if configured
+        # Apply redaction if configured, one exchange at a time
+        transform = None
         if redactor:
-            for exchange in tape_dict.get('exchanges', []):
-                from .redact import redact_exchange
-                exchange, _ = redact_exchange(exchange, redactor)
+            from .redact import redact_exchange
+            transform = lambda exchange: redact_exchange(exchange, redactor)[0]
 
-        # Atomic write with temp file
+        # Atomic write with temp file, streaming exchanges through a large buffer
+        # (binary mode: orjson's bytes go straight to disk without a str round-trip)
         with tempfile.NamedTemporaryFile(
-            mode='w',
-            encoding='utf-8',
+            mode='wb',
             dir=path.parent,
             suffix='.tmp',
-            delete=False
+            delete=False,
+            buffering=1 << 20
         ) as tmp:
-            # pyjson5 doesn't work with TemporaryFileWrapper, write as string
-            json_str = pyjson5.dumps(tape_dict, indent=2, trailing_commas=False)
-            tmp.write(json_str)
             tmp_path = Path(tmp.name)
-
-        # Use file locking for the rename
+            if isinstance(tape, dict):
+                exchanges = tape.get('exchanges', [])
+                if transform:
+                    exchanges = map(transform, exchanges)
+                tmp.writelines(iter_tape_json_bytes(tape.get('meta', {}), tape.get('session', {}), exchanges))
+            else:
+                tmp.writelines(tape.iter_json_bytes(transform))
+
+        # The temp file shares path's directory, so a single atomic rename suffices
         try:
-            shutil.move(str(tmp_path), str(path))
-        except Exception as e:
+            os.replace(tmp_path, path)
+        except OSError:
             tmp_path.unlink(missing_ok=True)
             raise
 
@@ -110,24 +180,30 @@ class TapeStore:
         self._index = {}
 
         for tape_idx, tape in enumerate(self.tapes):
+            # Program and args are shared by every exchange on the tape
+            tape_key = self._build_tape_key(tape.meta.program, tape.meta.args)
             for exchange_idx, exchange in enumerate(tape.exchanges):
                 # Build normalized key
-                key = self._build_exchange_key(tape, exchange)
+                key = self._build_exchange_key(tape_key, exchange)
                 self._index[key] = (tape_idx, exchange_idx)
 
-    def _build_exchange_key(self, tape: Tape, exchange: Exchange) -> str:
+    def _build_tape_key(self, program: str, args: List[str]) -> Tuple[str, str]:
+        """Build the normalized (program, args) part of an index key"""
+        # Memoized: every lookup from a session repeats the same program and args
+        raw = (program or '', tuple(args))
+        key = self._tape_keys.get(raw)
+        if key is None:
+            normalize = self._normalizer.normalize
+            key = self._tape_keys[raw] = (normalize(raw[0]), normalize(' '.join(args)))
+        return key
+
+    def _build_exchange_key(self, tape_key: Tuple[str, str], exchange: Exchange) -> Tuple[str, ...]:
         """Build normalized key for an exchange"""
-        parts = [
-            tape.meta.program,
-            ' '.join(tape.meta.args),
-            exchange.pre.get('prompt', ''),
-        ]
-
-        # Add input data
-        if exchange.input.data_text:
-            parts.append(exchange.input.data_text)
-
-        return self._normalizer.build_key(*parts)
+        normalize = self._normalizer.normalize
+        return tape_key + (
+            normalize(exchange.pre.get('prompt') or ''),
+            normalize(exchange.input.data_text or ''),
+        )
 
     def find_exchange(self,
                      program: str,
@@ -136,16 +212,16 @@ class TapeStore:
                      input_data: str) -> Optional[Tuple[Tape, Exchange, Path]]:
         """Find matching exchange in loaded tapes"""
         # Build search key
-        key = self._normalizer.build_key(
-            program,
-            ' '.join(args),
-            prompt,
-            input_data
+        normalize = self._normalizer.normalize
+        key = self._build_tape_key(program, args) + (
+            normalize(prompt or ''),
+            normalize(input_data or ''),
         )
 
         # Look up in index
-        if self._index and key in self._index:
-            tape_idx, exchange_idx = self._index[key]
+        hit = self._index.get(key) if self._index else None
+        if hit is not None:
+            tape_idx, exchange_idx = hit
             tape = self.tapes[tape_idx]
             exchange = tape.exchanges[exchange_idx]
             path = self.paths[tape_idx]
@@ -28,10 +28,11 @@ def print_summary(store: Optional['TapeStore']) -> None:
 
     # Show unused tapes (loaded but never matched)
     if hasattr(store, 'paths') and hasattr(store, 'used'):
-        unused = set(store.paths) - store.used
+        # One pass over paths in load order; no temporary set or sort
+        unused = [p for p in store.paths if p not in store.used]
         if unused:
             print("Unused tapes:")
-            for tape_path in sorted(unused):
+            for tape_path in unused:
                 if isinstance(tape_path, Path):
                     print(f"- {tape_path.name}")
                 else:
@@ -1,183 +1,107 @@
 #!/usr/bin/env python
-"""Test script to verify fixes for record & replay system"""
+"""Tests to verify fixes for record & replay system"""
 
 import os
 import sys
-import tempfile
-import shutil
-from pathlib import Path
+
+import pexpect
+import pytest
 
 # Add src to path
 sys.path.insert(0, 'src')
 
 from claudecontrol import Session, RecordMode, FallbackMode
+from claudecontrol.replay.play import ReplayTransport
+from claudecontrol.replay.store import TapeStore
+from claudecontrol.replay.matchers import CompositeMatcher
+
+
+@pytest.fixture(scope="session")
+def python_session():
+    """Python REPL session shared by every test that only needs a live interpreter"""
+    with Session(
+        command=f"{sys.executable} -q",
+        timeout=5,
+        summary=False,
+        persist=False,
+    ) as session:
+        session.expect(">>> ")
+        yield session
+
 
 def test_basic_session():
     """Test basic session creation and execution"""
-    print("Testing basic session creation...")
-    try:
-        with Session(
-            command="echo 'Hello World'",
-            timeout=5,
-            record=RecordMode.DISABLED,
-            fallback=FallbackMode.NOT_FOUND,
-            summary=False
-        ) as session:
-            # Wait for echo to complete
-            import pexpect
-            try:
-                session._transport.expect([pexpect.EOF], timeout=2)
-            except:
-                pass  # EOF expected
-
-            output = session.get_recent_output(10)
-            if "Hello World" in output or output.strip():
-                print(f"✓ Basic session works, output: {output.strip()}")
-                return True
-            else:
-                print(f"✗ Basic session failed: empty output")
-                return False
-    except Exception as e:
-        print(f"✗ Basic session failed: {e}")
-        return False
-
-def test_recording():
+    # echo never checks for a terminal, so run it over pipes
+    with Session(
+        command="echo 'Hello World'",
+        timeout=5,
+        record=RecordMode.DISABLED,
+        fallback=FallbackMode.NOT_FOUND,
+        summary=False,
+        persist=False,
+        pty=False,
+    ) as session:
+        assert session.expect([pexpect.EOF]) == 0
+        assert "Hello World" in session.get_recent_output(10)
+
+
+def test_recording(tmp_path):
     """Test recording functionality"""
-    print("\nTesting recording functionality...")
-    temp_dir = tempfile.mkdtemp(prefix="test_tapes_")
-    try:
-        # Record a session with cat (reads stdin)
-        with Session(
-            command="cat",
-            tapes_path=temp_dir,
-            record=RecordMode.NEW,
-            fallback=FallbackMode.NOT_FOUND,
-            summary=False,
-            persist=False,  # Ensure cleanup happens
-            timeout=5
-        ) as session:
-            # Send some input to create exchanges
-            session.sendline("Recording Test")
-            import time
-            time.sleep(0.2)  # Let cat echo back
-
-            # Send EOF to end cat
-            session.send("\x04")  # Ctrl-D
-            time.sleep(0.2)
-
-        # Check if tape was created
-        tapes = list(Path(temp_dir).glob("**/*.json5"))
-        if tapes:
-            print(f"✓ Recording works, created {len(tapes)} tape(s)")
-            return True
-        else:
-            print("✗ Recording failed: No tapes created")
-            return False
-    except Exception as e:
-        print(f"✗ Recording failed: {e}")
-        return False
-    finally:
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
-def test_python_session():
+    # Record a session with cat (reads stdin); cat needs no tty, so use pipes
+    with Session(
+        command="cat",
+        tapes_path=tmp_path,
+        record=RecordMode.NEW,
+        fallback=FallbackMode.NOT_FOUND,
+        summary=False,
+        persist=False,  # Ensure cleanup happens
+        timeout=5,
+        pty=False,
+    ) as session:
+        # Send some input to create exchanges
+        session.sendline("Recording Test")
+        session.expect_exact("Recording Test", timeout=2)
+    # Closing the session sends EOF to cat
+
+    # Check if tape was created
+    assert TapeStore(tmp_path).count_tapes() > 0, "No tapes created"
+
+
+def test_python_session(python_session):
     """Test with Python interpreter"""
-    print("\nTesting Python interpreter session...")
-    try:
-        with Session(
-            command="python -c \"print('Python Works')\"",
-            timeout=5,
-            record=RecordMode.DISABLED,
-            fallback=FallbackMode.NOT_FOUND,
-            summary=False
-        ) as session:
-            # Wait for python to complete
-            import pexpect
-            try:
-                session._transport.expect([pexpect.EOF], timeout=2)
-            except:
-                pass  # EOF expected
-
-            output = session.get_recent_output(10)
-            if "Python Works" in output:
-                print(f"✓ Python session works")
-                return True
-            else:
-                print(f"✗ Python session output incorrect: {output}")
-                return False
-    except Exception as e:
-        print(f"✗ Python session failed: {e}")
-        return False
+    # Build the string at runtime so any echoed input cannot satisfy the check
+    python_session.sendline("print('Python' + ' Works')")
+    python_session.expect(">>> ")
+    output = python_session.before
+    assert "Python Works" in output, f"Python session output incorrect: {output}"
+
 
 def test_type_hints():
     """Test that type hints are Python 3.9 compatible"""
-    print("\nChecking type hints compatibility...")
-    try:
-        # Just importing should work if type hints are fixed
-        from claudecontrol.replay.matchers import create_matcher_set
-        from claudecontrol.core import Session
-        print("✓ Type hints are compatible")
-        return True
-    except Exception as e:
-        print(f"✗ Type hint issue: {e}")
-        return False
+    # Just importing should work if type hints are fixed
+    from claudecontrol.replay.matchers import create_matcher_set
+    from claudecontrol.core import Session
+
 
 def test_thread_safety():
     """Test thread safety in replay"""
-    print("\nTesting thread safety...")
-    try:
-        from claudecontrol.replay.play import ReplayTransport
-        from claudecontrol.replay.store import TapeStore
-        from claudecontrol.replay.matchers import CompositeMatcher
-
-        # Create a replay transport
-        store = TapeStore("/tmp/test")
-        matcher = CompositeMatcher()
-        transport = ReplayTransport(
-            store=store,
-            matcher=matcher,
-            fallback_mode=FallbackMode.NOT_FOUND
-        )
-
-        # Check that buffer lock exists
-        if hasattr(transport, '_buffer_lock'):
-            print("✓ Thread safety locks in place")
-            return True
-        else:
-            print("✗ Missing thread safety locks")
-            return False
-    except Exception as e:
-        print(f"✗ Thread safety test failed: {e}")
-        return False
-
-def main():
-    """Run all tests"""
-    print("=" * 60)
-    print("Running ClaudeControl Fix Verification Tests")
-    print("=" * 60)
-
-    tests = [
-        test_basic_session,
-        test_recording,
-        test_python_session,
-        test_type_hints,
-        test_thread_safety
-    ]
-
-    results = []
-    for test in tests:
-        try:
-            results.append(test())
-        except Exception as e:
-            print(f"✗ Test {test.__name__} crashed: {e}")
-            results.append(False)
-
-    print("\n" + "=" * 60)
-    print("TEST RESULTS:")
-    print(f"Passed: {sum(results)}/{len(results)}")
-    print("Status:", "✓ ALL TESTS PASSED" if all(results) else "✗ SOME TESTS FAILED")
-    print("=" * 60)
-
-    return 0 if all(results) else 1
+    # Create a replay transport
+    store = TapeStore("/tmp/test")
+    matcher = CompositeMatcher()
+    transport = ReplayTransport(
+        store=store,
+        matcher=matcher,
+        fallback_mode=FallbackMode.NOT_FOUND
+    )
+
+    # Check that buffer lock exists
+    assert hasattr(transport, '_buffer_lock'), "Missing thread safety locks"
+    transport.close()
+
 
 if __name__ == "__main__":
-    sys.exit(main())
\ No newline at end of file
+    args = [__file__, "-v"]
+    # FAILFAST=1 stops at the first failure instead of spawning the remaining sessions
+    if os.environ.get("FAILFAST"):
+        args.append("-x")
+    sys.exit(pytest.main(args))
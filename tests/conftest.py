@@ -4,8 +4,10 @@ Shared fixtures and configuration for claudecontrol tests
 
 import os
 import sys
+import queue
 import tempfile
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import pytest
 
@@ -33,6 +35,42 @@ def temp_dir():
     shutil.rmtree(temp_path, ignore_errors=True)
 
 
+# Directories preallocated by _tape_pool
+TAPE_POOL_SIZE = 32
+
+
+def _recycle_dir(path, pool):
+    """Empty a pooled directory and hand it back to the pool"""
+    try:
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(exist_ok=True)
+    finally:
+        # Always return the directory so a failed cleanup cannot drain the pool
+        pool.put(path)
+
+
+@pytest.fixture(scope="session")
+def _tape_pool(tmp_path_factory):
+    """Preallocated tape directories plus a worker that empties them off the test's critical path"""
+    root = tmp_path_factory.mktemp("tape_pool")
+    pool = queue.Queue()
+    for i in range(TAPE_POOL_SIZE):
+        path = root / f"tapes_{i}"
+        path.mkdir()
+        pool.put(path)
+    with ThreadPoolExecutor(max_workers=2) as cleaner:
+        yield pool, cleaner
+
+
+@pytest.fixture
+def temp_tapes_dir(_tape_pool):
+    """Empty tapes directory taken from the session pool"""
+    pool, cleaner = _tape_pool
+    path = pool.get(timeout=30)
+    yield path
+    cleaner.submit(_recycle_dir, path, pool)
+
+
 @pytest.fixture
 def mock_script(temp_dir):
     """Create a mock Python script for testing"""
@@ -142,6 +180,27 @@ def safe_commands():
     ]
 
 
+def pytest_addoption(parser):
+    """Register the --run-slow option"""
+    parser.addoption("--run-slow", action="store_true", default=False,
+                     help="also run tests marked slow")
+
+
+def pytest_configure(config):
+    """Register custom markers"""
+    config.addinivalue_line("markers", "slow: redundant or long-running cases, skipped without --run-slow")
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip slow-marked tests unless --run-slow is given"""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="needs --run-slow")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
 # Ensure proper cleanup on test session end
 def pytest_sessionfinish(session, exitstatus):
     """Cleanup after all tests complete"""
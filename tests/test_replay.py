@@ -3,82 +3,94 @@ Integration tests for record/replay functionality
 Tests recording and playback of CLI sessions using tapes
 """
 
+import base64
 import pytest
-import tempfile
-import shutil
-from pathlib import Path
+import pexpect
+import pyjson5
 import time
 
 from claudecontrol import Session, RecordMode, FallbackMode
+from claudecontrol.replay import store as store_module
 from claudecontrol.replay.store import TapeStore
-from claudecontrol.replay.exceptions import TapeMissError
+from claudecontrol.replay.model import Tape, Chunk
+from claudecontrol.replay.play import ReplayTransport
+from claudecontrol.replay.matchers import CompositeMatcher
+from claudecontrol.replay.latency import LatencyPolicy
+from claudecontrol.replay.errors import ErrorInjectionPolicy
+from claudecontrol.replay.exceptions import TapeMissError, SchemaError
+
+
+def _drain(session, timeout=2):
+    """Wait for the spawned command to exit instead of sleeping a fixed time"""
+    try:
+        session._transport.expect([pexpect.EOF], timeout=timeout)
+    except pexpect.TIMEOUT:
+        pass
+
+
+# Command recorded once by the session-scoped recorded_tapes fixture
+RECORDED_COMMAND = "echo 'Hello World'"
+
+
+@pytest.fixture(scope="session")
+def recorded_tapes(tmp_path_factory):
+    """Record RECORDED_COMMAND once for tests that only replay"""
+    tapes_dir = tmp_path_factory.mktemp("recorded_tapes")
+    with Session(
+        command=RECORDED_COMMAND,
+        tapes_path=tapes_dir,
+        record=RecordMode.NEW,
+        fallback=FallbackMode.NOT_FOUND,
+        summary=False,
+    ) as session:
+        _drain(session)
+    return tapes_dir
 
 
 class TestRecordReplay:
     """Test record and replay functionality"""
 
-    @pytest.fixture
-    def temp_tapes_dir(self):
-        """Create temporary tapes directory"""
-        temp_dir = tempfile.mkdtemp(prefix="test_tapes_")
-        yield Path(temp_dir)
-        shutil.rmtree(temp_dir, ignore_errors=True)
-
     def test_record_simple_session(self, temp_tapes_dir):
         """Test recording a simple echo session"""
         # Record a session
         with Session(
             command="echo 'Hello World'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             fallback=FallbackMode.NOT_FOUND,
             summary=False,
         ) as session:
             # The echo command should complete immediately
-            time.sleep(0.5)  # Give it time to execute
+            _drain(session)
 
         # Verify tape was created
         store = TapeStore(temp_tapes_dir)
-        store.load_all()
-        assert len(store.tapes) > 0, "No tapes were created"
+        assert store.count_tapes() > 0, "No tapes were created"
 
-        # Verify tape content
-        tape = store.tapes[0]
-        assert tape.meta.program == "echo"
-        assert "Hello World" in tape.meta.args
+        # Verify tape content (only the meta block is parsed)
+        meta = store.load_meta_only(next(temp_tapes_dir.rglob("*.json5")))
+        assert meta.program == "echo"
+        assert "Hello World" in meta.args
 
-    def test_replay_recorded_session(self, temp_tapes_dir):
+    def test_replay_recorded_session(self, recorded_tapes):
         """Test replaying a previously recorded session"""
-        # First, record a session with python
-        test_input = "print('test output')"
-
-        with Session(
-            command="python3 -c \"print('test output')\"",
-            tapes_path=str(temp_tapes_dir),
-            record=RecordMode.NEW,
-            fallback=FallbackMode.NOT_FOUND,
-            summary=False,
-        ) as session:
-            time.sleep(0.5)
-
-        # Now replay the session
         with Session(
-            command="python3 -c \"print('test output')\"",
-            tapes_path=str(temp_tapes_dir),
+            command=RECORDED_COMMAND,
+            tapes_path=recorded_tapes,
             record=RecordMode.DISABLED,
             fallback=FallbackMode.NOT_FOUND,
             summary=False,
         ) as session:
             # In replay mode, the session should use the tape
-            # and not actually run python
+            # and not actually run echo
             pass
 
-    def test_tape_miss_raises_error(self, temp_tapes_dir):
+    def test_tape_miss_raises_error(self, recorded_tapes):
         """Test that missing tape raises error in NOT_FOUND mode"""
         with pytest.raises(TapeMissError):
             with Session(
                 command="nonexistent_command",
-                tapes_path=str(temp_tapes_dir),
+                tapes_path=recorded_tapes,
                 record=RecordMode.DISABLED,
                 fallback=FallbackMode.NOT_FOUND,
                 summary=False,
@@ -90,87 +102,72 @@ class TestRecordReplay:
         # Record initial session
         with Session(
             command="echo 'first'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             fallback=FallbackMode.NOT_FOUND,
             summary=False,
         ) as session:
-            time.sleep(0.5)
+            _drain(session)
 
         # Record again with OVERWRITE
         with Session(
             command="echo 'second'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.OVERWRITE,
             fallback=FallbackMode.NOT_FOUND,
             summary=False,
         ) as session:
-            time.sleep(0.5)
+            _drain(session)
 
-        # Check that we still have tapes
-        store = TapeStore(temp_tapes_dir)
-        store.load_all()
-        assert len(store.tapes) > 0
+        # Check that we still have tapes (existence only, so skip parsing them)
+        assert TapeStore(temp_tapes_dir).count_tapes() > 0
 
     def test_proxy_mode_fallback(self, temp_tapes_dir):
         """Test that PROXY mode falls back to live process"""
         # Use PROXY mode with no existing tapes
         with Session(
             command="echo 'proxy test'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             fallback=FallbackMode.PROXY,
             summary=False,
         ) as session:
             # Should run the real command and record it
-            time.sleep(0.5)
+            _drain(session)
 
         # Verify tape was created
-        store = TapeStore(temp_tapes_dir)
-        store.load_all()
-        assert len(store.tapes) > 0
+        assert TapeStore(temp_tapes_dir).count_tapes() > 0
 
     def test_tape_matching(self, temp_tapes_dir):
         """Test that tapes match based on command and args"""
         # Record two different commands
         with Session(
             command="echo 'one'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             summary=False,
         ) as session:
-            time.sleep(0.5)
+            _drain(session)
 
         with Session(
             command="echo 'two'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             summary=False,
         ) as session:
-            time.sleep(0.5)
+            _drain(session)
 
         # Verify we have multiple tapes
-        store = TapeStore(temp_tapes_dir)
-        store.load_all()
-        assert len(store.tapes) >= 2
+        assert TapeStore(temp_tapes_dir).count_tapes() >= 2
 
-    @pytest.mark.parametrize("latency", [0, 10, 50])
-    def test_latency_injection(self, temp_tapes_dir, latency):
+    @pytest.mark.parametrize("latency", [0, pytest.param(10, marks=pytest.mark.slow), 50])
+    def test_latency_injection(self, recorded_tapes, latency):
         """Test latency injection during replay"""
-        # Record a session
-        with Session(
-            command="echo 'latency test'",
-            tapes_path=str(temp_tapes_dir),
-            record=RecordMode.NEW,
-            summary=False,
-        ) as session:
-            time.sleep(0.5)
-
-        # Replay with latency
+        # Replay the shared recording with latency
         start = time.time()
         with Session(
-            command="echo 'latency test'",
-            tapes_path=str(temp_tapes_dir),
+            command=RECORDED_COMMAND,
+            tapes_path=recorded_tapes,
             record=RecordMode.DISABLED,
             fallback=FallbackMode.NOT_FOUND,
             latency=latency,
@@ -184,19 +181,22 @@ class TestRecordReplay:
         if latency > 0:
             assert elapsed >= latency / 2  # Allow some variance
 
-    def test_summary_output(self, temp_tapes_dir, capsys):
+    def test_summary_output(self, temp_tapes_dir, capfd):
         """Test that summary is printed when enabled"""
+        # Discard anything written before the session so only its output is checked
+        capfd.readouterr()
+
         # Record with summary enabled
         with Session(
             command="echo 'summary test'",
-            tapes_path=str(temp_tapes_dir),
+            tapes_path=temp_tapes_dir,
             record=RecordMode.NEW,
             summary=True,
         ) as session:
-            time.sleep(0.5)
+            _drain(session)
 
         # Check that summary was printed
-        captured = capsys.readouterr()
+        captured = capfd.readouterr()
         assert "SUMMARY" in captured.out or len(captured.out) > 0
 
 
@@ -206,8 +206,6 @@ class TestTapeManagement:
     @pytest.fixture
     def sample_tape(self, tmp_path):
         """Create a sample tape file"""
-        import pyjson5
-
         tape_data = {
             "meta": {
                 "createdAt": "2025-01-01T00:00:00Z",
@@ -249,6 +247,39 @@ class TestTapeManagement:
         tape = store.load_tape(sample_tape / "test.json5")
         assert tape.meta.program == "test"
 
+    def test_load_meta_only(self, sample_tape):
+        """Test reading just the meta block of a tape"""
+        store = TapeStore(sample_tape)
+
+        assert store.count_tapes() == 1
+        meta = store.load_meta_only(sample_tape / "test.json5")
+        assert meta == store.load_tape(sample_tape / "test.json5").meta
+
+    @pytest.mark.parametrize("use_orjson", [True, False])
+    def test_malformed_tape_raises_schema_error(self, tmp_path, monkeypatch, use_orjson):
+        """Test that a badly shaped tape fails the same way with or without orjson"""
+        if use_orjson and store_module.orjson is None:
+            pytest.skip("orjson not installed")
+        if not use_orjson:
+            monkeypatch.setattr(store_module, "orjson", None)
+
+        tape_path = tmp_path / "bad.json5"
+        tape_path.write_text('{"meta": {"program": "test"}, "exchanges": [42]}')
+
+        with pytest.raises(SchemaError):
+            TapeStore(tmp_path).load_tape(tape_path)
+
+    def test_tape_save_roundtrip(self, sample_tape):
+        """Test that streamed tape writes load back unchanged"""
+        store = TapeStore(sample_tape)
+        tape = store.load_tape(sample_tape / "test.json5")
+        saved = store.save_tape(tape, sample_tape / "copy" / "test.json5")
+
+        assert store.load_tape(saved).to_dict() == tape.to_dict()
+        # Output stays readable by the JSON5 loader
+        with open(saved) as f:
+            assert pyjson5.load(f) == tape.to_dict()
+
     def test_tape_indexing(self, sample_tape):
         """Test tape indexing for fast lookup"""
         store = TapeStore(sample_tape)
@@ -262,6 +293,96 @@ class TestTapeManagement:
             input_data="test"
         )
 
-        # May or may not find depending on normalization
-        # Just verify it doesn't crash
-        assert result is None or result is not None
\ No newline at end of file
+        assert result is not None
+        tape, exchange, path = result
+        assert exchange is store.tapes[0].exchanges[0]
+        assert path == sample_tape / "test.json5"
+        assert path in store.used
+
+        # A different input misses the index
+        assert store.find_exchange(program="test", args=[], prompt="> ", input_data="other") is None
+
+    def test_chunk_accepts_data_b64(self):
+        """Test that chunks can still be built from base64 text"""
+        chunk = Chunk(delay_ms=5, data_b64=base64.b64encode(b"hello").decode())
+        assert chunk == Chunk(5, b"hello")
+        assert chunk.data_b64 == "aGVsbG8="
+
+
+class TestReplayTransport:
+    """Test ReplayTransport directly against synthetic tapes"""
+
+    def test_expect_bytes_match_groups(self, tmp_path):
+        """Test that match groups survive the buffer trim after a bytes-mode expect"""
+        tape = Tape.from_dict({
+            "meta": {"createdAt": "2025-01-01T00:00:00Z", "program": "test", "args": [], "env": {}, "cwd": "/tmp"},
+            "session": {},
+            "exchanges": [{
+                "pre": {"prompt": ""},
+                "input": {"type": "line", "dataText": "hi\n"},
+                "output": {"chunks": [{"delay_ms": 0, "dataB64": base64.b64encode(b"value=42\n> ").decode()}]},
+            }],
+        })
+        store = TapeStore(tmp_path)
+        store.save_tape(tape, tmp_path / "test.json5")
+        store.load_all()
+
+        transport = ReplayTransport(
+            store=store,
+            matcher=CompositeMatcher(),
+            program="test",
+            latency_policy=LatencyPolicy(global_latency=(0, 0)),
+        )
+        try:
+            transport.sendline("hi")
+            assert transport.expect(r"value=(\d+)", timeout=5) == 0
+            assert transport.match.group(0) == b"value=42"
+            assert transport.match.group(1) == b"42"
+            assert transport.after == b"value=42"
+        finally:
+            transport.close()
+
+    def test_seeded_error_policy_is_per_session(self, tmp_path):
+        """Test that transports sharing a seeded policy draw the same failures independently"""
+        policy = ErrorInjectionPolicy(error_rate=50, seed=7)
+        transports = [
+            ReplayTransport(store=TapeStore(tmp_path), matcher=CompositeMatcher(), error_policy=policy)
+            for _ in range(2)
+        ]
+        try:
+            first, second = [
+                [policy.should_fail(None, t._error_rng) for _ in range(20)] for t in transports
+            ]
+            assert first == second
+            assert any(first) and not all(first)
+        finally:
+            for t in transports:
+                t.close()
+
+    def test_reindexes_after_store_reload(self, tmp_path):
+        """Test that tapes loaded after the transport was created can be replayed"""
+        store = TapeStore(tmp_path)
+        transport = ReplayTransport(
+            store=store,
+            matcher=CompositeMatcher(),
+            program="test",
+            latency_policy=LatencyPolicy(global_latency=(0, 0)),
+        )
+        try:
+            tape = Tape.from_dict({
+                "meta": {"createdAt": "2025-01-01T00:00:00Z", "program": "test", "args": [], "env": {}, "cwd": "/tmp"},
+                "session": {},
+                "exchanges": [{
+                    "pre": {"prompt": ""},
+                    "input": {"type": "line", "dataText": "hi\n"},
+                    "output": {"chunks": [{"delay_ms": 0, "dataB64": base64.b64encode(b"hello\n").decode()}]},
+                }],
+            })
+            store.save_tape(tape, tmp_path / "test.json5")
+            store.load_all()
+
+            transport.sendline("hi")
+            assert transport.expect("hello", timeout=5) == 0
+            assert transport._indexed_generation == store.generation
+        finally:
+            transport.close()